@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = ('creator', 'administrator')
+
+
+class AdminCache:
+    """
+    Cache daftar admin per chat dengan TTL dan refresh di latar belakang.
+    Selama umur data di bawah refresh_after, is_admin() tidak menunggu jaringan dan refresh
+    berjalan di latar (stale-while-revalidate). Chat yang belum dikenal, atau datanya melewati
+    ttl_seconds, menunggu satu pengambilan (paling lama fetch_timeout detik). Jika gagal,
+    hasilnya gagal tertutup: tidak ada yang dianggap admin, dan selama failure_backoff detik
+    pesan berikutnya tidak ikut menunggu.
+    """
+    def __init__(self, loader, ttl_seconds=600, refresh_ahead=0.8, max_chats=1000, workers=2, fetch_timeout=3.0, failure_backoff=30.0):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.refresh_after = ttl_seconds * refresh_ahead
+        self.max_chats = max(1, int(max_chats))
+        self.fetch_timeout = fetch_timeout
+        self.failure_backoff = failure_backoff
+        self._entries = OrderedDict()  # chat_id -> (admin_ids, fetched_at)
+        self._inflight = {}  # chat_id -> Future refresh yang sedang berjalan
+        self._fresh_pending = set()  # chat yang butuh refresh fresh=True setelah refresh berjalan selesai
+        self._failed_until = {}  # chat_id -> monotonic; pengambilan terakhir gagal
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="admin-refresh")
+        self.stats = {'hits': 0, 'cold_misses': 0, 'expired': 0, 'blocking_fetches': 0, 'fail_closed': 0,
+                      'refreshes': 0, 'refresh_errors': 0, 'invalidations': 0}
+
+    def _fresh_entry(self, chat_id, now):
+        entry = self._entries.get(chat_id)
+        return entry if entry is not None and now - entry[1] <= self.ttl_seconds else None
+
+    def is_admin(self, chat_id, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is None:
+                self.stats['cold_misses'] += 1
+            elif now - entry[1] > self.ttl_seconds:
+                self.stats['expired'] += 1
+                entry = None
+            else:
+                self._entries.move_to_end(chat_id)
+                self.stats['hits'] += 1
+            if entry is None and now < self._failed_until.get(chat_id, 0.0):
+                self.stats['fail_closed'] += 1
+                return False
+        if entry is not None:
+            if now - entry[1] > self.refresh_after:
+                self.refresh(chat_id)
+            return user_id in entry[0]
+        return self._is_admin_blocking(chat_id, user_id)
+
+    def _is_admin_blocking(self, chat_id, user_id):
+        with self._lock:
+            self.stats['blocking_fetches'] += 1
+        try:
+            self.refresh(chat_id).result(timeout=self.fetch_timeout)
+        except Exception as e:
+            logger.warning(f"Menunggu daftar admin untuk {chat_id} gagal: {e}")
+        with self._lock:
+            entry = self._fresh_entry(chat_id, time.monotonic())
+            if entry is None:
+                self.stats['fail_closed'] += 1
+                return False
+        return user_id in entry[0]
+
+    def refresh(self, chat_id, fresh=False):
+        """
+        Menjadwalkan pengambilan ulang di latar belakang (paling banyak satu per chat) dan mengembalikan Future-nya.
+        fresh=True diteruskan ke loader agar melewati salinan bersama dan bertanya langsung ke Telegram.
+        """
+        with self._lock:
+            future = self._inflight.get(chat_id)
+            if future is not None:
+                if fresh:
+                    self._fresh_pending.add(chat_id)
+                return future
+            future = self._inflight[chat_id] = self._pool.submit(self._refresh, chat_id, fresh)
+            return future
+
+    def _refresh(self, chat_id, fresh=False):
+        try:
+            admin_ids = self.loader(chat_id, fresh=fresh)
+            with self._lock:
+                self._entries[chat_id] = (frozenset(admin_ids), time.monotonic())
+                self._entries.move_to_end(chat_id)
+                while len(self._entries) > self.max_chats:
+                    self._entries.popitem(last=False)
+                self._failed_until.pop(chat_id, None)
+                self.stats['refreshes'] += 1
+        except Exception as e:
+            with self._lock:
+                self.stats['refresh_errors'] += 1
+                self._failed_until[chat_id] = time.monotonic() + self.failure_backoff
+            logger.error(f"Could not update admin list for {chat_id}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(chat_id, None)
+                again = chat_id in self._fresh_pending
+                self._fresh_pending.discard(chat_id)
+            if again:
+                self.refresh(chat_id, fresh=True)
+
+    def apply_member_update(self, chat_id, user_id, new_status):
+        """Menerapkan perubahan status dari update 'chat_member' seketika, lalu refresh penuh dari Telegram."""
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is not None:
+                admin_ids = set(entry[0])
+                if new_status in ADMIN_STATUSES:
+                    admin_ids.add(user_id)
+                else:
+                    admin_ids.discard(user_id)
+                self._entries[chat_id] = (frozenset(admin_ids), entry[1])
+            self.stats['invalidations'] += 1
+        self.refresh(chat_id, fresh=True)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, chats=len(self._entries), refreshing=len(self._inflight))
@@ -0,0 +1,133 @@
+import functools
+import logging
+import threading
+import time
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Admission:
+    ADMIT = 'admit'
+    DEGRADE = 'degrade'   # dijawab dengan respons kalengan, tanpa kerja mahal
+    SHED = 'shed'         # dilewati sepenuhnya
+
+
+class LoadLevel:
+    NORMAL = 0
+    BUSY = 1
+    OVERLOADED = 2
+    NAMES = {NORMAL: 'normal', BUSY: 'busy', OVERLOADED: 'overloaded'}
+
+
+# Kelas kerja dari yang paling penting: moderation > callback/command > reply (CA/buy) > ai > hype.
+WORK_CLASSES = ('moderation', 'callback', 'command', 'reply', 'ai', 'hype')
+
+# Kelas yang dikurangi: level beban minimum dan keputusannya. Moderasi tidak pernah dikurangi.
+SHED_POLICY = {
+    'hype': (LoadLevel.BUSY, Admission.SHED),
+    'ai': (LoadLevel.OVERLOADED, Admission.DEGRADE),
+}
+
+
+class _Probe:
+    __slots__ = ('name', 'read', 'busy', 'overloaded', 'value')
+
+    def __init__(self, name, read, busy, overloaded):
+        self.name = name
+        self.read = read
+        self.busy = busy
+        self.overloaded = overloaded
+        self.value = 0
+
+
+class AdmissionControl:
+    """
+    Admission control berbasis prioritas. Beban dibaca dari probe (update yang sedang diproses,
+    umur antrian keluar, kedalaman antrian update) dan diringkas menjadi satu level; level
+    dihitung ulang paling sering tiap REFRESH_SECONDS agar admit() tetap murah di jalur panas.
+    Hanya satu thread yang menghitung ulang (lock non-blocking); thread lain memakai level
+    terakhir, yang dibaca sebagai satu atribut tanpa lock.
+    """
+    REFRESH_SECONDS = 0.25
+
+    def __init__(self, inflight_busy, inflight_overloaded, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._inflight = 0
+        self._probes = []
+        self._level = LoadLevel.NORMAL
+        self._level_at = 0.0
+        self.stats = {work_class: {decision: 0 for decision in (Admission.ADMIT, Admission.DEGRADE, Admission.SHED)} for work_class in WORK_CLASSES}
+        self.add_probe('inflight', lambda: self._inflight, inflight_busy, inflight_overloaded)
+
+    def add_probe(self, name, read, busy, overloaded):
+        """Mendaftarkan sinyal beban: read() >= busy berarti BUSY, >= overloaded berarti OVERLOADED."""
+        self._probes.append(_Probe(name, read, busy, overloaded))
+
+    def tracked(self, handler):
+        """Membungkus handler agar jumlah update yang sedang diproses ikut terhitung."""
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                self._inflight += 1
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._inflight -= 1
+        return wrapper
+
+    def level(self):
+        now = time.monotonic()
+        if now - self._level_at < self.REFRESH_SECONDS:
+            return self._level
+        if not self._refresh_lock.acquire(blocking=False):
+            return self._level
+        try:
+            return self._refresh_level(now)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_level(self, now):
+        level = LoadLevel.NORMAL
+        for probe in self._probes:
+            try:
+                probe.value = probe.read()
+            except Exception as e:
+                logger.error(f"Probe beban '{probe.name}' gagal: {e}")
+                continue
+            if probe.value >= probe.overloaded:
+                level = LoadLevel.OVERLOADED
+            elif probe.value >= probe.busy:
+                level = max(level, LoadLevel.BUSY)
+        if level != self._level:
+            readings = ", ".join(f"{probe.name}={probe.value:g}" for probe in self._probes)
+            logger.warning(f"Level beban berubah: {LoadLevel.NAMES[self._level]} -> {LoadLevel.NAMES[level]} ({readings})")
+        self._level, self._level_at = level, now
+        return level
+
+    def admit(self, work_class):
+        """Keputusan untuk satu unit kerja: Admission.ADMIT, DEGRADE, atau SHED."""
+        decision = Admission.ADMIT
+        policy = SHED_POLICY.get(work_class)
+        if self.enabled and policy is not None and self.level() >= policy[0]:
+            decision = policy[1]
+        with self._lock:
+            self.stats[work_class][decision] += 1
+        if decision != Admission.ADMIT:
+            metrics.inc('admission_shed_total', (('class', work_class), ('decision', decision)))
+        return decision
+
+    def snapshot(self):
+        level = self.level()
+        with self._lock:
+            payload = {'level': level, 'inflight': self._inflight}
+            for work_class, counts in self.stats.items():
+                for decision, count in counts.items():
+                    payload[f"{work_class}_{decision}"] = count
+        for probe in self._probes:
+            payload[f"probe_{probe.name}"] = probe.value
+        return payload
@@ -0,0 +1,104 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ResponseCache:
+    """
+    Cache LRU+TTL di depan jalur AI, dengan kunci teks pertanyaan yang dinormalisasi.
+    Pertanyaan identik yang datang bersamaan berbagi satu permintaan yang sedang
+    berjalan (single-flight), jadi hanya satu panggilan Groq yang dilakukan.
+    """
+    _PUNCTUATION = re.compile(r'[^\w\s]+')
+    _WHITESPACE = re.compile(r'\s+')
+
+    def __init__(self, max_entries=500, ttl_seconds=3600, wait_timeout=30):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'errors': 0}
+
+    @classmethod
+    def normalize(cls, text):
+        text = cls._PUNCTUATION.sub(' ', (text or '').lower())
+        return cls._WHITESPACE.sub(' ', text).strip()
+
+    def get_or_compute(self, text, compute):
+        """Mengembalikan jawaban dari cache, dari permintaan yang sedang berjalan, atau dari compute()."""
+        key, value, inflight, leader = self._begin(text)
+        if inflight is None:
+            return value
+        if not leader:
+            return inflight.result(timeout=self.wait_timeout)
+        try:
+            value = compute()
+        except Exception as e:
+            self._fail(key, inflight, e)
+            raise
+        self._finish(key, inflight, value)
+        return value
+
+    async def get_or_compute_async(self, text, compute):
+        """Versi asyncio: compute() adalah coroutine function. Berbagi single-flight dengan jalur sinkron."""
+        key, value, inflight, leader = self._begin(text)
+        if inflight is None:
+            return value
+        if not leader:
+            return await asyncio.wait_for(asyncio.wrap_future(inflight), self.wait_timeout)
+        try:
+            value = await compute()
+        except BaseException as e:
+            # Termasuk CancelledError, agar penunggu lain tidak tergantung sampai timeout.
+            self._fail(key, inflight, e)
+            raise
+        self._finish(key, inflight, value)
+        return value
+
+    def _begin(self, text):
+        """Mengembalikan (key, nilai_cache, inflight, leader); inflight None berarti cache hit."""
+        key = self.normalize(text)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return key, entry[1], None, False
+                del self._entries[key]
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.stats['coalesced'] += 1
+                return key, None, inflight, False
+            inflight = self._inflight[key] = Future()
+            self.stats['misses'] += 1
+            return key, None, inflight, True
+
+    def _fail(self, key, inflight, error):
+        with self._lock:
+            self.stats['errors'] += 1
+            self._inflight.pop(key, None)
+        inflight.set_exception(error)
+
+    def _finish(self, key, inflight, value):
+        with self._lock:
+            if value:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+            self._inflight.pop(key, None)
+        inflight.set_result(value)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+            hit_rate = (self.stats['hits'] + self.stats['coalesced']) / lookups if lookups else 0.0
+            return dict(self.stats, size=len(self._entries), inflight=len(self._inflight), hit_rate=round(hit_rate, 4))
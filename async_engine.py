@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import random
+import time
+
+import telebot
+from config import Config
+from bot_logic import BotLogic
+from outbound import OutboundDispatcher
+from streaming import ThrottledEditor
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramApiError(Exception):
+    """Error dari Bot API; atributnya sama dengan ApiTelegramException milik telebot."""
+    def __init__(self, method, error_code, description, result_json):
+        super().__init__(f"{method} gagal [{error_code}]: {description}")
+        self.error_code = error_code
+        self.description = description
+        self.result_json = result_json
+
+
+class AsyncTelegramApi:
+    """
+    Klien Bot API berbasis httpx.AsyncClient (satu pool keep-alive bersama).
+    Nama dan argumen metodenya mengikuti TeleBot, jadi OutboundDispatcher bisa memakainya tanpa perubahan.
+    """
+    def __init__(self, token, http_client, base_url="https://api.telegram.org"):
+        self.http = http_client
+        self.url = f"{base_url}/bot{token}/"
+
+    async def _call(self, method, payload):
+        payload = {key: value for key, value in payload.items() if value is not None}
+        markup = payload.get('reply_markup')
+        if markup is not None and hasattr(markup, 'to_dict'):
+            payload['reply_markup'] = markup.to_dict()
+        response = await self.http.post(self.url + method, json=payload)
+        try:
+            data = response.json()
+        except ValueError:
+            raise TelegramApiError(method, response.status_code, response.text[:200], {})
+        if not data.get('ok'):
+            raise TelegramApiError(method, data.get('error_code', response.status_code), data.get('description'), data)
+        return data.get('result')
+
+    @staticmethod
+    def _message(result):
+        return telebot.types.Message.de_json(result) if isinstance(result, dict) else result
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return self._message(await self._call('sendMessage', dict(kwargs, chat_id=chat_id, text=text)))
+
+    async def reply_to(self, message, text, **kwargs):
+        return await self.send_message(message.chat.id, text, reply_to_message_id=message.message_id, **kwargs)
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        return self._message(await self._call('editMessageText', dict(kwargs, text=text, chat_id=chat_id, message_id=message_id)))
+
+    async def delete_message(self, chat_id, message_id):
+        return await self._call('deleteMessage', {'chat_id': chat_id, 'message_id': message_id})
+
+    async def answer_callback_query(self, callback_query_id, **kwargs):
+        return await self._call('answerCallbackQuery', dict(kwargs, callback_query_id=callback_query_id))
+
+
+class AsyncOutbound(OutboundDispatcher):
+    """
+    OutboundDispatcher yang worker-nya task asyncio, bukan thread.
+    Penjadwalan, token bucket dan retry tetap dari kelas dasar; submit() boleh dipanggil
+    dari thread mana pun (timer, scheduler) dan hasilnya tetap concurrent.futures.Future.
+    """
+    def __init__(self, api, loop, **kwargs):
+        super().__init__(api, **kwargs)
+        self.loop = loop
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def start(self):
+        # Harus dipanggil sekali dari event loop sebelum server menerima update.
+        if self._tasks:
+            return
+        for index in range(self.workers):
+            self._tasks.append(self.loop.create_task(self._async_worker(), name=f"outbound-{index}"))
+
+    def _notify(self):
+        self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _async_worker(self):
+        while True:
+            with self._cond:
+                job, wait_for = self._next_job()
+                if job is None:
+                    self._wakeup.clear()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait_for)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job.attempts += 1
+            job.started = time.monotonic()
+            try:
+                result = await job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                self._complete(job, error=e)
+                continue
+            self._complete(job, result=result)
+
+
+class AsyncBotLogic(BotLogic):
+    """
+    BotLogic untuk mode asyncio: semua I/O Telegram lewat AsyncOutbound dan jawaban AI
+    berjalan sebagai coroutine di event loop, jadi handler tidak pernah menunggu jaringan.
+    """
+    def __init__(self, bot_instance, api, http_client, loop):
+        self.api = api
+        self.loop = loop
+        self.http = http_client
+        super().__init__(bot_instance)
+        self.async_groq = self._initialize_async_groq()
+        self._ai_slots = asyncio.Semaphore(Config.AI_CONCURRENCY())
+        self._ai_tasks = set()
+        self.admission.add_probe('ai_inflight', lambda: len(self._ai_tasks), Config.AI_CONCURRENCY(), Config.AI_CONCURRENCY() * 4)
+        # Dimuat sekarang agar handler di event loop tidak menunggu query DB saat pesan pertama.
+        self._load_responses()
+
+    def _create_outbound(self):
+        return AsyncOutbound(self.api, self.loop, workers=Config.OUTBOUND_WORKERS(), global_rate=Config.OUTBOUND_GLOBAL_RATE(), chat_rate=Config.OUTBOUND_CHAT_RATE())
+
+    def _initialize_async_groq(self):
+        try:
+            import groq
+        except ImportError:
+            groq = None
+        if not Config.GROQ_API_KEY() or not groq:
+            logger.warning("Groq tidak tersedia atau GROQ_API_KEY hilang. Fitur AI dinonaktifkan.")
+            return None
+        try:
+            return groq.AsyncGroq(api_key=Config.GROQ_API_KEY(), base_url=Config.GROQ_BASE_URL(), http_client=self.http)
+        except Exception as e:
+            logger.error(f"Gagal menginisialisasi klien Groq async: {e}")
+            return None
+
+    def pending_work(self):
+        """Jumlah jawaban AI yang berjalan ditambah panggilan Bot API yang masih antre."""
+        return len(self._ai_tasks) + self.outbound.depth()
+
+    def snapshot(self):
+        payload = super().snapshot()
+        payload["ai_inflight"] = len(self._ai_tasks)
+        return payload
+
+    def _reply_ai(self, message, text):
+        if not self.async_groq:
+            return False
+        future = asyncio.run_coroutine_threadsafe(self._reply_ai_async(message.chat.id, text), self.loop)
+        self._ai_tasks.add(future)
+        future.add_done_callback(self._ai_tasks.discard)
+        return True
+
+    async def _reply_ai_async(self, chat_id, text):
+        thinking_future = self.outbound.send_message(chat_id, "🐸 The NPEPE oracle is consulting the memes...")
+        try:
+            if Config.AI_STREAMING():
+                editor = ThrottledEditor(self.outbound, chat_id, thinking_future, min_interval=self.STREAM_EDIT_INTERVAL_SECONDS, min_growth=self.STREAM_EDIT_MIN_GROWTH)
+                ai_response = await self.ai_cache.get_or_compute_async(text, lambda: self._ask_groq_streaming_async(text, editor.update))
+            else:
+                ai_response = await self.ai_cache.get_or_compute_async(text, lambda: self._ask_groq_async(text))
+        except Exception as e:
+            logger.error(f"AI response error: {e}", exc_info=True)
+            ai_response = random.choice(self.responses.get("FINAL_FALLBACK", ["Sorry fren, can’t answer now."]))
+        # Edit terakhir masuk antrian setelah edit streaming mana pun: chat yang sama dilayani berurutan.
+        await self._edit_or_send_async(chat_id, thinking_future, ai_response)
+
+    async def _ask_groq_async(self, text):
+        async with self._ai_slots:
+            with metrics.timer('groq_request_seconds', call='answer'):
+                chat_completion = await self.async_groq.chat.completions.create(
+                    messages=self._groq_messages(text),
+                    model="llama3-8b-8192", temperature=0.7, max_tokens=150
+                )
+        return chat_completion.choices[0].message.content
+
+    async def _ask_groq_streaming_async(self, text, on_progress):
+        parts = []
+        async with self._ai_slots:
+            with metrics.timer('groq_request_seconds', call='answer_stream'):
+                stream = await self.async_groq.chat.completions.create(
+                    messages=self._groq_messages(text),
+                    model="llama3-8b-8192", temperature=0.7, max_tokens=150, stream=True
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        on_progress("".join(parts))
+        return "".join(parts)
+
+    async def _edit_or_send_async(self, chat_id, message_future, text):
+        try:
+            sent = await asyncio.wait_for(asyncio.wrap_future(message_future), self.SEND_RESULT_TIMEOUT_SECONDS)
+        except Exception:
+            sent = None
+        if sent is None:
+            return self.outbound.send_message(chat_id, text)
+
+        def _fallback(edit_future):
+            if edit_future.exception() is not None:
+                self.outbound.send_message(chat_id, text)
+
+        edit_future = self.outbound.edit_message_text(text, chat_id, sent.message_id)
+        edit_future.add_done_callback(_fallback)
+        return edit_future
@@ -0,0 +1,132 @@
+"""
+Pengganti lokal untuk Bot API Telegram dan endpoint Groq, dipakai oleh bench/replay.py.
+
+Satu ThreadingHTTPServer melayani keduanya:
+  POST /bot<token>/<method>              -> jawaban Bot API palsu (dihitung per method)
+  POST /openai/v1/chat/completions       -> jawaban Groq palsu setelah jeda 'groq_latency'
+"""
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class FakeServices:
+    def __init__(self, host="127.0.0.1", port=0, groq_latency=0.3, telegram_latency=0.0, groq_answer="ribbit fren, WAGMI 🐸"):
+        self.groq_latency = groq_latency
+        self.telegram_latency = telegram_latency
+        self.groq_answer = groq_answer
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._message_ids = itertools.count(1000)
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch(b"")
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self._dispatch(self.rfile.read(length) if length else b"")
+
+            def _dispatch(self, raw):
+                # telebot mengirim parameter di query string; httpx/groq mengirim JSON di body.
+                url = urlsplit(self.path)
+                body = dict(parse_qsl(url.query))
+                if raw and 'json' in self.headers.get('Content-Type', ''):
+                    body.update(json.loads(raw))
+                elif raw:
+                    body.update(parse_qsl(raw.decode('utf-8')))
+                if url.path.startswith('/openai/'):
+                    services._groq(self, body)
+                elif url.path.startswith('/bot'):
+                    services._telegram(self, url.path.rsplit('/', 1)[-1], body)
+                else:
+                    self._send(404, {"ok": False})
+
+            def _send(self, status, payload, content_type='application/json'):
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.calls)
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    # --- Telegram ---
+
+    def _telegram(self, handler, method, body):
+        self._count(method)
+        if self.telegram_latency:
+            time.sleep(self.telegram_latency)
+        chat_id = body.get('chat_id', 0)
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            pass
+        if method in ('sendMessage', 'editMessageText'):
+            message_id = int(body.get('message_id') or next(self._message_ids))
+            result = {"message_id": message_id, "date": int(time.time()), "text": body.get('text', ''),
+                      "chat": {"id": chat_id, "type": "supergroup"}}
+        elif method == 'getChatAdministrators':
+            result = [{"status": "creator", "user": {"id": 1, "is_bot": False, "first_name": "owner"}}]
+        elif method == 'getMe':
+            result = {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        elif method == 'getUpdates':
+            result = []
+        else:
+            result = True
+        handler._send(200, {"ok": True, "result": result})
+
+    # --- Groq ---
+
+    def _groq(self, handler, body):
+        self._count('groq')
+        time.sleep(self.groq_latency)
+        if body.get('stream'):
+            chunks = []
+            for word in self.groq_answer.split(' '):
+                chunk = {"id": "bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get('model', 'bench'),
+                         "choices": [{"index": 0, "delta": {"content": word + ' '}, "finish_reason": None}]}
+                chunks.append(f"data: {json.dumps(chunk)}\n\n")
+            chunks.append("data: [DONE]\n\n")
+            handler._send(200, "".join(chunks).encode('utf-8'), content_type='text/event-stream')
+            return
+        handler._send(200, {
+            "id": "bench", "object": "chat.completion", "created": int(time.time()), "model": body.get('model', 'bench'),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.groq_answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        })
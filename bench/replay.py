@@ -0,0 +1,273 @@
+"""
+Harness benchmark: memutar ulang aliran update (sintetis atau rekaman JSONL) ke aplikasi Flask
+di main.py, dengan Bot API dan Groq palsu dari bench/fake_services.py.
+
+Contoh:
+  python bench/replay.py --updates 2000 --rate 200 --concurrency 16 --chats 40
+  python bench/replay.py --mix chatter=40,question=30,spam=20,join=5,callback=5 --groq-latency 0.5
+  python bench/replay.py --replay rekaman.jsonl --fast-ack --json hasil.json
+
+Update sintetis disebar ke --chats grup: limit Telegram per chat (OUTBOUND_CHAT_RATE, default 1 pesan/detik)
+membuat satu grup tunggal tidak pernah selesai di-drain. Batas waktu drain default mengikuti jumlah update
+dan OUTBOUND_GLOBAL_RATE.
+Tanpa --database-url persistensi dimatikan seperti saat psycopg2 tidak ada (db.available False): tidak ada
+koneksi yang dicoba dan thread log moderasi tidak berjalan. Isi dengan DSN Postgres lokal untuk mengukur
+jalur DB sungguhan.
+Laporan: throughput, latensi webhook p50/p90/p99, jumlah panggilan keluar per method, dan memori puncak.
+Bagian "checks" memeriksa regresi (mis. edit pesan benar-benar sampai ke Bot API); exit code 1 jika gagal.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fake_services import FakeServices
+
+BOT_TOKEN = "123456:bench-token"
+GROUP_CHAT_ID = -1001000000000
+DISABLED_DATABASE_URL = "postgresql://bench-disabled"
+OWNER_ID = 1
+DEFAULT_MIX = "chatter=60,question=15,spam=15,join=5,callback=5"
+
+CHATTER = ["gm frens", "lfg this is bullish", "who else is holding", "chart looks green today", "ribbit ribbit",
+           "diamond hands only", "wen moon", "ape in or wait?", "send it", "this community is based"]
+QUESTIONS = ["what is npepe?", "how does the burn work?", "when is the next listing?", "is this the official group?",
+             "can you explain the tokenomics?", "why frog?"]
+SPAM = ["Free airdrop!! claim at myairdrop.com now", "Join our pump group for trading signal t.me/pumpers",
+        "Private sale whitelist open, DM me", "giveaway 1000 USDT visit bit.ly/free-usdt",
+        "best investment advice here, check other project 7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU",
+        # Alamat kontrak di dalam tautan, termasuk domain yang ada di allowlist.
+        "https://pump.fun/7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU", "pump.fun/4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R now",
+        "see evil.com/0x6982508145454ce325ddbe47a25d4ec3d2311933"]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {'chatter', 'question', 'spam', 'join', 'callback'}
+    if unknown:
+        raise SystemExit(f"Jenis update tidak dikenal di --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class SyntheticUpdates:
+    def __init__(self, seed, users=500, chats=1):
+        self.random = random.Random(seed)
+        self.users = users
+        self.chat_ids = [GROUP_CHAT_ID - index for index in range(max(1, chats))]
+        self.update_id = 100000
+        self.message_id = 1
+
+    def _user(self):
+        user_id = self.random.randint(1000, 1000 + self.users)
+        return {"id": user_id, "is_bot": False, "first_name": f"fren{user_id}"}
+
+    def _message(self, **fields):
+        self.message_id += 1
+        message = {"message_id": self.message_id, "date": int(time.time()), "from": self._user(),
+                   "chat": {"id": self.random.choice(self.chat_ids), "type": "supergroup", "title": "bench"}}
+        message.update(fields)
+        return message
+
+    def make(self, kind):
+        self.update_id += 1
+        update = {"update_id": self.update_id}
+        if kind == 'chatter':
+            update["message"] = self._message(text=self.random.choice(CHATTER))
+        elif kind == 'question':
+            update["message"] = self._message(text=self.random.choice(QUESTIONS))
+        elif kind == 'spam':
+            update["message"] = self._message(text=self.random.choice(SPAM))
+        elif kind == 'join':
+            members = [self._user() for _ in range(self.random.randint(1, 5))]
+            update["message"] = self._message(new_chat_members=members, new_chat_member=members[0], new_chat_participant=members[0])
+        elif kind == 'callback':
+            update["callback_query"] = {"id": str(self.update_id), "from": self._user(), "chat_instance": "bench",
+                                        "data": self.random.choice(["hype", "about", "ca"]),
+                                        "message": self._message(text="menu")}
+        return update
+
+    def stream(self, count, mix):
+        kinds, weights = zip(*mix.items())
+        return [self.make(self.random.choices(kinds, weights)[0]) for _ in range(count)]
+
+
+def load_replay(path):
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def expected_edits(updates):
+    """Tombol 'about' dan 'ca' selalu mengedit pesan menu; dipakai sebagai pemeriksaan regresi jalur edit."""
+    return sum(1 for update in updates if (update.get("callback_query") or {}).get("data") in ("about", "ca"))
+
+
+def expected_deletes(updates):
+    """Setiap pesan dari daftar SPAM harus dihapus (flood juga menghapus, jadi ini batas bawah)."""
+    return sum(1 for update in updates if (update.get("message") or {}).get("text") in SPAM)
+
+
+def configure_environment(args, fake):
+    os.environ.update({
+        "BOT_TOKEN": BOT_TOKEN,
+        "WEBHOOK_BASE_URL": "http://127.0.0.1",
+        # main.py mewajibkan DATABASE_URL terisi; tanpa --database-url nilainya tidak pernah dipakai (lihat disable_database).
+        "DATABASE_URL": args.database_url or DISABLED_DATABASE_URL,
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": fake.url,
+        "GROUP_CHAT_ID": str(GROUP_CHAT_ID),
+        "GROUP_OWNER_ID": str(OWNER_ID),
+        "SCHEDULER_ENABLED": "false",
+        "WEBHOOK_FAST_ACK": "true" if args.fast_ack else "false",
+    })
+    os.environ.setdefault("JOIN_WINDOW_SECONDS", "1")
+
+
+def disable_database():
+    """Mematikan persistensi lewat jalur yang sama dengan psycopg2 tidak terinstal, sebelum main.py membuat BotLogic."""
+    import database
+    database.PSYCOPG2_INSTALLED = False
+
+
+def drain_timeout(updates):
+    """Satu update menghasilkan paling banyak sekitar satu panggilan keluar, dan semuanya melewati limit global."""
+    from config import Config
+    return 30.0 + len(updates) / Config.OUTBOUND_GLOBAL_RATE()
+
+
+def wait_for_drain(main, fake, timeout):
+    """Menunggu antrian keluar kosong dan jumlah panggilan ke server palsu berhenti bertambah."""
+    deadline = time.monotonic() + timeout
+    last, stable_since = None, time.monotonic()
+    while time.monotonic() < deadline:
+        calls = sum(fake.snapshot().values())
+        busy = main.bot_logic.outbound.depth() > 0
+        if main.update_dispatcher:
+            busy = busy or main.update_dispatcher.depth() > 0
+        if calls != last or busy:
+            last, stable_since = calls, time.monotonic()
+        elif time.monotonic() - stable_since >= 1.0:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def run(args):
+    tracemalloc.start()
+    fake = FakeServices(groq_latency=args.groq_latency, telegram_latency=args.telegram_latency).start()
+    configure_environment(args, fake)
+    if not args.database_url:
+        disable_database()
+
+    import telebot
+    telebot.apihelper.API_URL = fake.url + "/bot{0}/{1}"
+    import main
+
+    if not main.bot_logic:
+        raise SystemExit("BotLogic gagal diinisialisasi; periksa log di atas.")
+    # Balasan tertunda dipersingkat agar ikut terhitung selama fase drain.
+    main.bot_logic.IDENTITY_REPLY_DELAY_SECONDS = 0.5
+    main.bot_logic.HYPE_REPLY_DELAY_SECONDS = 0.5
+
+    updates = load_replay(args.replay) if args.replay else SyntheticUpdates(args.seed, chats=args.chats).stream(args.updates, parse_mix(args.mix))
+    wait_for_drain(main, fake, timeout=5)
+    baseline = fake.snapshot()
+    tracemalloc.reset_peak()
+
+    client_local = threading.local()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def send(update):
+        client = getattr(client_local, 'client', None)
+        if client is None:
+            client = client_local.client = main.app.test_client()
+        body = json.dumps(update)
+        started = time.perf_counter()
+        response = client.post(f"/{BOT_TOKEN}", data=body, content_type='application/json')
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    print(f"Memutar {len(updates)} update (rate={args.rate or 'maks'}/s, concurrency={args.concurrency}, fast_ack={args.fast_ack})...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for index, update in enumerate(updates):
+            if args.rate:
+                delay = started + index / args.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, update)
+    send_elapsed = time.perf_counter() - started
+    drained = wait_for_drain(main, fake, timeout=args.drain or drain_timeout(updates))
+    total_elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+
+    calls = {method: count - baseline.get(method, 0) for method, count in fake.snapshot().items() if count - baseline.get(method, 0)}
+    latencies.sort()
+    report = {
+        "updates": len(updates),
+        "send_seconds": round(send_elapsed, 3),
+        "total_seconds": round(total_elapsed, 3),
+        "throughput_per_second": round(len(updates) / send_elapsed, 1) if send_elapsed else None,
+        "webhook_latency_ms": {name: round(percentile(latencies, pct) * 1000, 2) for name, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+        "status_codes": statuses,
+        "outbound_calls": calls,
+        "outbound": main.bot_logic.outbound.snapshot(),
+        "drained": drained,
+        "checks": {"edits_delivered": calls.get("editMessageText", 0) >= expected_edits(updates),
+                   "spam_deleted": calls.get("deleteMessage", 0) >= expected_deletes(updates)},
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+    }
+    fake.stop()
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark replay update NPEPE bot terhadap layanan palsu lokal.")
+    parser.add_argument("--updates", type=int, default=1000, help="jumlah update sintetis")
+    parser.add_argument("--rate", type=float, default=0, help="update per detik (0 = secepat mungkin)")
+    parser.add_argument("--concurrency", type=int, default=8, help="jumlah pengirim webhook paralel")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="bobot jenis update: chatter,question,spam,join,callback")
+    parser.add_argument("--replay", help="berkas JSONL berisi satu Update JSON per baris (menggantikan update sintetis)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--groq-latency", type=float, default=0.3, help="jeda jawaban Groq palsu (detik)")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="jeda jawaban Bot API palsu (detik)")
+    parser.add_argument("--fast-ack", action="store_true", help="jalankan dengan WEBHOOK_FAST_ACK=true")
+    parser.add_argument("--chats", type=int, default=25, help="jumlah grup tujuan update sintetis")
+    parser.add_argument("--database-url", help="DSN Postgres lokal; tanpa ini persistensi dimatikan")
+    parser.add_argument("--drain", type=float, help="batas waktu menunggu antrian keluar kosong (detik); "
+                                                    "default 30 + jumlah update / OUTBOUND_GLOBAL_RATE")
+    parser.add_argument("--json", help="simpan laporan ke berkas JSON ini")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    failed = [name for name, ok in report["checks"].items() if not ok]
+    if failed:
+        raise SystemExit(f"Pemeriksaan gagal: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -6,25 +6,31 @@ import json
 import re
 from datetime import datetime, timezone
 import threading
-
-# --- Pustaka Pihak Ketiga ---
-try:
-    import psycopg2
-    logging.info("DIAGNOSTIK: Pustaka 'psycopg2' BERHASIL diimpor.")
-except ImportError as e:
-    psycopg2 = None
-    logging.critical(f"DIAGNOSTIK: KRITIS - GAGAL mengimpor 'psycopg2'. Persistensi akan dinonaktifkan. Error: {e}")
-
-try:
-    import groq
-    import httpx
-except ImportError:
-    groq = None
-    httpx = None
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import telebot
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import Config
+from chat_state import ChatStateStore
+from database import Database
+from admin_cache import AdminCache, ADMIN_STATUSES
+from ai_cache import ResponseCache
+from delayed_actions import DelayedActions
+from outbound import OutboundDispatcher, Priority
+from response_store import ResponseStore
+from streaming import ThrottledEditor
+from moderation import SpamFilter
+from near_duplicate import NearDuplicateDetector
+from flood_control import FloodControl
+from intents import Intent, IntentRouter
+from join_aggregator import JoinAggregator
+from schedule_state import ScheduleState
+from scheduler import ScheduleRunner
+from shared_state import SharedState
+from metrics import metrics
+from admission import Admission, AdmissionControl
+from moderation_log import ModerationLog
+from profiler import SamplingProfiler
 
 # ==========================
 #  🔧  KONFIGURASI LOGGING
@@ -44,86 +50,113 @@ class BotLogic:
         self.bot = bot_instance
         
         # Pemeriksaan Kritis Saat Inisialisasi
-        if not Config.DATABASE_URL() or not psycopg2:
+        self.db = Database(Config.DATABASE_URL(), max_size=Config.DB_POOL_SIZE())
+        if not self.db.available:
             logger.critical("FATAL: DATABASE_URL tidak ditemukan atau psycopg2 tidak tersedia. Persistensi tidak akan berfungsi.")
             
-        self.groq_client = self._initialize_groq()
-        self.responses = self._load_initial_responses()
-        self.admin_ids = set()
-        self.admins_last_updated = 0
-        self.last_random_reply_time = 0
+        # Klien Groq (dan impor groq/httpx) dibuat saat pertama kali dibutuhkan.
+        self._groq_client = None
+        self._groq_initialized = False
+        self._groq_lock = threading.Lock()
+        self.response_store = ResponseStore(self.db)
+        self.moderation_log = ModerationLog(self.db, batch_size=Config.MODLOG_BATCH_SIZE(), flush_seconds=Config.MODLOG_FLUSH_SECONDS(), max_buffer=Config.MODLOG_MAX_BUFFER())
+        self.scale_out = Config.SCALE_OUT()
+        self.shared_state = SharedState(self.db)
+        if self.scale_out and not self.db.available:
+            logger.critical("SCALE_OUT aktif tetapi DB tidak tersedia; jadwal tidak akan dijalankan.")
+        self._responses = None
+        self._responses_lock = threading.Lock()
+        self._renewal_lock = threading.Lock()
+        self.ai_cache = ResponseCache(max_entries=Config.AI_CACHE_SIZE(), ttl_seconds=Config.AI_CACHE_TTL())
+        self.delayed = DelayedActions()
+        self.outbound = self._create_outbound()
+        self.profiler = SamplingProfiler(Config.PROFILE_DIR(), interval=Config.PROFILE_INTERVAL_MS() / 1000.0, max_seconds=Config.PROFILE_MAX_SECONDS())
+        self.admission = AdmissionControl(Config.ADMISSION_BUSY_INFLIGHT(), Config.ADMISSION_OVERLOAD_INFLIGHT(), enabled=Config.ADMISSION_ENABLED())
+        self.admission.add_probe('outbound_age', self.outbound.oldest_age, Config.ADMISSION_BUSY_QUEUE_AGE(), Config.ADMISSION_OVERLOAD_QUEUE_AGE())
         
         # Konstanta Bot
         self.COOLDOWN_SECONDS = 90
+        self.ADMIN_CACHE_SECONDS = 600
+        self.admin_cache = AdminCache(self._fetch_admin_ids, ttl_seconds=self.ADMIN_CACHE_SECONDS, max_chats=Config.ADMIN_CACHE_MAX_CHATS())
+        self.GREET_DELAY_SECONDS = Config.JOIN_WINDOW_SECONDS()
+        self.RAID_MODE_SECONDS = Config.RAID_MODE_SECONDS()
+        self.MAX_MESSAGE_LENGTH = 4000  # di bawah batas 4096 karakter Telegram
+        self.IDENTITY_REPLY_DELAY_SECONDS = 20
+        self.HYPE_REPLY_DELAY_SECONDS = 15
+        self.SEND_RESULT_TIMEOUT_SECONDS = 30
+        self.DB_READY_TIMEOUT_SECONDS = 10
+        self.DEGRADED_REPLY_SECONDS = 30
+        self.STREAM_EDIT_INTERVAL_SECONDS = 1.0
+        self.STREAM_EDIT_MIN_GROWTH = 20
         self.BASE_REPLY_CHANCE = 0.20
         self.HYPE_REPLY_CHANCE = 0.75
         self.HYPE_KEYWORDS = ['buy', 'bought', 'pump', 'moon', 'lfg', 'send it', 'green', 'bullish', 'rocket', 'diamond', 'hodl', 'ape', 'lets go', 'ath']
         self.FORBIDDEN_KEYWORDS = ['airdrop', 'giveaway', 'presale', 'private sale', 'whitelist', 'signal', 'pump group', 'trading signal', 'investment advice', 'other project']
+        # Kategori yang diperbarui AI tiap minggu: (prompt, jumlah minimum baris). Hanya ini yang disimpan ke DB.
+        self.RENEWABLE_CATEGORIES = {
+            "HYPE": ("Produce 100 short hype messages for a meme coin bot. Funny, enthusiastic, use slang like LFG, WAGMI, ribbit, fren. Each 5-30 words.", 50),
+            "WISDOM": ("Produce 20 wise, motivational quotes for a crypto community. Meme-themed, short, inspiring about HODL, community, moon.", 10),
+            "MORNING_GREETING": ("Produce 20 unique 'good morning' greetings for a crypto community. Energetic, funny, meme-themed.", 10),
+            "NOON_GREETING": ("Produce 20 unique 'midday' check-in messages for a crypto community. Motivational, keep the energy high.", 10),
+            "NIGHT_GREETING": ("Produce 20 unique 'good night' messages for a crypto community. Calming, but bullish for tomorrow.", 10),
+            "GREET_NEW_MEMBERS": ("Produce 20 unique welcome messages for new members in a crypto group. Must include the placeholder '{name}'. Friendly and exciting.", 10)
+        }
         self.ALLOWED_DOMAINS = ['pump.fun', 't.me/NPEPEVERSE', 'x.com/NPEPE_Verse', 'base44.app']
+        self.chat_states = ChatStateStore(self.COOLDOWN_SECONDS, self.BASE_REPLY_CHANCE, self.HYPE_REPLY_CHANCE,
+                                          schedule_targets=Config.SCHEDULE_CHAT_IDS(), max_chats=Config.CHAT_STATE_MAX_CHATS())
+        self.join_aggregator = JoinAggregator(self.delayed, self._send_greetings, self._handle_join_raid,
+                                              window_seconds=self.GREET_DELAY_SECONDS, raid_threshold=Config.JOIN_RAID_THRESHOLD())
+        self.QUESTION_WORDS = ['what', 'how', 'when', 'where', 'why', 'who', 'can', 'could', 'is', 'are', 'do', 'does', 'explain']
+        self.flood_control = FloodControl(rate=Config.FLOOD_RATE(), burst=Config.FLOOD_BURST())
+        self.duplicate_detector = NearDuplicateDetector(window_seconds=Config.DUPLICATE_WINDOW_SECONDS(), min_users=Config.DUPLICATE_MIN_USERS(), min_tokens=Config.DUPLICATE_MIN_TOKENS())
+        self.spam_filter = SpamFilter(self.FORBIDDEN_KEYWORDS, self.ALLOWED_DOMAINS, Config.CONTRACT_ADDRESS())
+        self.intent_router = IntentRouter(self._build_intents())
         
-        self._ensure_db_table_exists()
+        self.schedule_state = ScheduleState(self.db)
+        self._db_ready = threading.Event()
+        if Config.FAST_START():
+            # DDL dan pemuatan state jadwal tidak perlu menahan server untuk mulai menerima update.
+            threading.Thread(target=self._init_database, name="db-init", daemon=True).start()
+        else:
+            self._init_database()
+        self.schedules = self._build_schedules()
+        self.scheduler = ScheduleRunner(self.schedules, self.schedule_state, clock=self._get_current_utc_time, claim_runs=self.scale_out)
         self._register_handlers()
+        # Hangatkan cache admin grup tujuan agar pesan pertama tidak salah moderasi.
+        for chat_id in self.chat_states.schedule_targets():
+            if isinstance(chat_id, int):
+                self.admin_cache.refresh(chat_id)
         logger.info("BotLogic berhasil diinisialisasi.")
 
-    def _get_db_connection(self):
-        db_url = Config.DATABASE_URL()
-        if not db_url or not psycopg2:
-            logger.warning("DATABASE_URL tidak diatur atau psycopg2 tidak terinstal. Persistensi dinonaktifkan.")
-            return None
-        try:
-            return psycopg2.connect(db_url)
-        except Exception as e:
-            logger.error(f"Koneksi DB gagal: {e}")
-            return None
-
-    def _ensure_db_table_exists(self):
-        conn = self._get_db_connection()
-        if conn:
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute("CREATE TABLE IF NOT EXISTS schedule_log (task_name TEXT PRIMARY KEY, last_run_date TEXT)")
-                conn.commit()
-                logger.info("Tabel database 'schedule_log' siap.")
-            except Exception as e:
-                logger.error(f"Gagal membuat tabel jadwal: {e}")
-            finally:
-                conn.close()
-
-    def _get_last_run_date(self, task_name):
-        conn = self._get_db_connection()
-        if not conn: return None
+    def _init_database(self):
+        started = time.perf_counter()
         try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT last_run_date FROM schedule_log WHERE task_name = %s", (task_name,))
-                result = cursor.fetchone()
-            return result[0] if result else None
-        except Exception as e:
-            logger.error(f"Gagal mendapatkan tanggal terakhir dijalankan untuk {task_name}: {e}")
-            return None
+            self._ensure_db_table_exists()
+            self.response_store.ensure_table()
+            self.moderation_log.ensure_table()
+            self.moderation_log.start()
+            if self.scale_out:
+                self.shared_state.ensure_tables()
+            self.schedule_state.load()
         finally:
-            if conn: conn.close()
+            self._db_ready.set()
+        logger.info(f"Inisialisasi database selesai dalam {time.perf_counter() - started:.3f} detik.")
 
-    def _update_last_run_date(self, task_name, run_date):
-        conn = self._get_db_connection()
-        if not conn: return
+    def _ensure_db_table_exists(self):
+        if not self.db.available:
+            logger.warning("DATABASE_URL tidak diatur atau psycopg2 tidak terinstal. Persistensi dinonaktifkan.")
+            return
         try:
-            with conn.cursor() as cursor:
-                cursor.execute("INSERT INTO schedule_log (task_name, last_run_date) VALUES (%s, %s) ON CONFLICT (task_name) DO UPDATE SET last_run_date = EXCLUDED.last_run_date", (task_name, run_date))
-            conn.commit()
+            self.db.execute("CREATE TABLE IF NOT EXISTS schedule_log (task_name TEXT PRIMARY KEY, last_run_date TEXT)")
+            logger.info("Tabel database 'schedule_log' siap.")
         except Exception as e:
-            logger.error(f"Gagal memperbarui DB untuk {task_name}: {e}")
-            try: conn.rollback()
-            except: pass
-        finally:
-            if conn: conn.close()
+            logger.error(f"Gagal membuat tabel jadwal: {e}")
 
     def _get_current_utc_time(self):
         return datetime.now(timezone.utc)
 
-    def check_and_run_schedules(self):
-        now_utc = self._get_current_utc_time()
-        today_utc_str = now_utc.strftime('%Y-%m-%d')
-        schedules = {
+    def _build_schedules(self):
+        return {
             'hype_asia_open':  {'hour': 2, 'task': self.send_scheduled_greeting, 'args': ('random',)},
             'hype_late_asia':  {'hour': 4, 'task': self.send_scheduled_greeting, 'args': ('random',)},
             'morning_europe':  {'hour': 7, 'task': self.send_scheduled_greeting, 'args': ('morning',)},
@@ -135,41 +168,80 @@ class BotLogic:
             'hype_us_close':   {'hour': 23, 'task': self.send_scheduled_greeting, 'args': ('random',)},
             'ai_renewal':      {'hour': 10, 'day_of_week': 5, 'task': self.renew_responses_with_ai, 'args': ()}
         }
-        for name, schedule in schedules.items():
-            last_run_date = self._get_last_run_date(name)
-            should_run = False
-            is_weekly = 'day_of_week' in schedule
-            
-            if is_weekly:
-                iso_key = now_utc.strftime('%Y-W%U')
-                if (now_utc.weekday() == schedule['day_of_week'] and now_utc.hour >= schedule['hour'] and last_run_date != iso_key):
-                    should_run = True
-            else:
-                if (now_utc.hour >= schedule['hour'] and last_run_date != today_utc_str):
-                    should_run = True
-            
-            if should_run:
-                try:
-                    logger.info(f"Menjalankan tugas terjadwal: {name} pada {now_utc.isoformat()}")
-                    schedule['task'](*schedule.get('args', ()))
-                    run_marker = iso_key if is_weekly else today_utc_str
-                    self._update_last_run_date(name, run_marker)
-                except Exception as e:
-                    logger.error(f"Error menjalankan tugas terjadwal {name}: {e}", exc_info=True)
+
+    def start_scheduler(self):
+        if self._db_ready.is_set():
+            self.scheduler.start()
+        else:
+            threading.Thread(target=self._start_scheduler_when_ready, name="scheduler-start", daemon=True).start()
+
+    def _start_scheduler_when_ready(self):
+        # Jadwal baru dievaluasi setelah state terakhir dimuat, agar tugas hari ini tidak terulang.
+        self._db_ready.wait()
+        self.scheduler.start()
+
+    def _create_outbound(self):
+        return OutboundDispatcher(self.bot, workers=Config.OUTBOUND_WORKERS(), global_rate=Config.OUTBOUND_GLOBAL_RATE(), chat_rate=Config.OUTBOUND_CHAT_RATE())
+
+    def snapshot(self):
+        """Statistik komponen untuk endpoint /stats."""
+        return {"db_pool": self.db.stats(), "outbound": self.outbound.snapshot(), "ai_cache": self.ai_cache.snapshot(),
+                "admin_cache": self.admin_cache.snapshot(), "chat_states": self.chat_states.snapshot(), "joins": self.join_aggregator.snapshot(),
+                "flood": self.flood_control.snapshot(), "near_duplicates": self.duplicate_detector.snapshot(),
+                "admission": self.admission.snapshot(), "moderation_log": self.moderation_log.snapshot(), "profiler": self.profiler.snapshot()}
+
+    @property
+    def groq_client(self):
+        if not self._groq_initialized:
+            with self._groq_lock:
+                if not self._groq_initialized:
+                    self._groq_client = self._initialize_groq()
+                    self._groq_initialized = True
+        return self._groq_client
 
     def _initialize_groq(self):
         api_key = Config.GROQ_API_KEY()
-        if not api_key or not groq or not httpx:
+        try:
+            import groq
+            import httpx
+        except ImportError:
+            groq = httpx = None
+        if not api_key or not groq:
             logger.warning("Groq tidak tersedia atau GROQ_API_KEY hilang. Fitur AI dinonaktifkan.")
             return None
         try:
-            client = groq.Groq(api_key=api_key, http_client=httpx.Client(timeout=15.0))
+            client = groq.Groq(api_key=api_key, base_url=Config.GROQ_BASE_URL(), http_client=httpx.Client(timeout=15.0))
             logger.info("Klien Groq berhasil diinisialisasi.")
             return client
         except Exception as e:
             logger.error(f"Gagal menginisialisasi klien Groq: {e}")
             return None
 
+    @property
+    def responses(self):
+        # Dimuat saat pertama kali dipakai agar startup tidak menunggu query DB.
+        if self._responses is None:
+            self._load_responses()
+        return self._responses
+
+    @responses.setter
+    def responses(self, value):
+        self._responses = value
+
+    def _load_responses(self):
+        with self._responses_lock:
+            if self._responses is not None:
+                return
+            responses = self._load_initial_responses()
+            # Mode fast start: tabel mungkin masih dibuat di latar belakang.
+            self._db_ready.wait(self.DB_READY_TIMEOUT_SECONDS)
+            version, stored = self.response_store.load_latest()
+            if stored:
+                # Hanya kategori hasil AI; kategori lain selalu dari kode agar editan di kode tidak tertimpa.
+                responses.update(self._renewable_only(stored))
+                logger.info(f"Respons dimuat dari versi tersimpan {version}.")
+            self._responses = responses
+
     def _load_initial_responses(self):
         return {
             "BOT_IDENTITY": [ "Bot? No, fren. I am NPEPE. 🐸", "I'm not just a bot. I am the spirit of the NPEPEVERSE, in digital form. ✨", "Call me a bot if you want, but I'm really just NPEPE's hype machine. My only job is to spread the gospel. LFG! 🚀", "Are you asking if I'm just code? Nah. I'm the based energy of NPEPE, here to send it. *ribbit*", "Part bot, part frog, all legend. But you can just call me NPEPE.", "What kind of bot? The kind that's destined for the moon. I am NPEPE. 🌕", "I'm NPEPE, manifested. My code runs on pure, uncut hype and diamond hands. 💎", "I am the signal, not the noise. I am NPEPE.", "They built a bot, but the spirit of NPEPE took over. So, yeah. I'm NPEPE.", "I'm the ghost in the machine, and the machine is fueled by NPEPE. So, that's what I am. 👻" ],
@@ -185,10 +257,16 @@ class BotLogic:
         }
     
     def _register_handlers(self):
-        self.bot.message_handler(content_types=['new_chat_members'])(self.greet_new_members)
-        self.bot.message_handler(commands=['start', 'help'])(self.send_welcome)
-        self.bot.callback_query_handler(func=lambda call: True)(self.handle_callback_query)
-        self.bot.message_handler(func=lambda message: True, content_types=['text', 'photo', 'video', 'sticker', 'document'])(self.handle_all_text)
+        self.bot.message_handler(content_types=['new_chat_members'])(self._timed_handler(self.greet_new_members))
+        self.bot.message_handler(commands=['start', 'help'])(self._timed_handler(self.send_welcome))
+        self.bot.message_handler(commands=['modstats'])(self._timed_handler(self.handle_modstats))
+        self.bot.message_handler(commands=['profile'])(self._timed_handler(self.handle_profile))
+        self.bot.callback_query_handler(func=lambda call: True)(self._timed_handler(self.handle_callback_query))
+        self.bot.chat_member_handler()(self._timed_handler(self.handle_chat_member))
+        self.bot.message_handler(func=lambda message: True, content_types=['text', 'photo', 'video', 'sticker', 'document'])(self._timed_handler(self.handle_all_text))
+
+    def _timed_handler(self, handler):
+        return self.admission.tracked(self.profiler.counted(metrics.timed('handler_seconds', handler=handler.__name__)(handler)))
     
     def main_menu_keyboard(self):
         keyboard = InlineKeyboardMarkup(row_width=2)
@@ -200,96 +278,311 @@ class BotLogic:
         )
         return keyboard
     
-    def _update_admin_ids(self, chat_id):
-        now = time.time()
-        if now - self.admins_last_updated > 600:
-            try:
-                admins = self.bot.get_chat_administrators(chat_id)
-                self.admin_ids = {admin.user.id for admin in admins if admin and admin.user}
-                self.admins_last_updated = now
-            except Exception as e:
-                logger.error(f"Could not update admin list: {e}")
-
-    def _is_spam_or_ad(self, message):
+    def _fetch_admin_ids(self, chat_id, fresh=False):
+        # Dipanggil oleh AdminCache di thread latar belakang, tidak pernah di jalur pesan.
+        # fresh=True (perubahan admin): baris bersama dilewati lalu ditimpa agar replika lain ikut tahu.
+        if self.scale_out and not fresh:
+            shared = self.shared_state.load_admins(chat_id, self.ADMIN_CACHE_SECONDS)
+            if shared is not None:
+                return shared
+        admins = self.bot.get_chat_administrators(chat_id)
+        admin_ids = {admin.user.id for admin in admins if admin and admin.user}
+        if self.scale_out:
+            self.shared_state.store_admins(chat_id, admin_ids)
+        return admin_ids
+
+    def handle_chat_member(self, update):
+        try:
+            old_status = getattr(update.old_chat_member, 'status', None)
+            new_status = getattr(update.new_chat_member, 'status', None)
+            if (old_status in ADMIN_STATUSES) != (new_status in ADMIN_STATUSES):
+                user = getattr(update.new_chat_member, 'user', None)
+                logger.info(f"Status admin berubah di chat {update.chat.id}: {old_status} -> {new_status}")
+                self.admin_cache.apply_member_update(update.chat.id, user.id if user else None, new_status)
+        except Exception as e:
+            logger.error(f"Error di chat_member handler: {e}", exc_info=True)
+
+    def _is_spam_or_ad(self, message, strict=False):
         text = (message.text or message.caption or "") if message else ""
-        text_lower = text.lower()
-        
-        for keyword in self.FORBIDDEN_KEYWORDS:
-            if keyword in text_lower:
-                return True, f"Forbidden Keyword: {keyword}"
-        
-        if "http" in text_lower or "t.me" in text_lower:
-            urls = re.findall(r'(https?://[^\s]+)|([\w\.-]+(?:\.[\w\.-]+)+)', text)
-            urls_flat = [u[0] or u[1] for u in urls if u[0] or u[1]]
-            for url in urls_flat:
-                if not any(domain in url for domain in self.ALLOWED_DOMAINS):
-                    return True, f"Unauthorized Link: {url}"
-        
-        solana_pattern = r'\b[1-9A-HJ-NP-Za-km-z]{32,44}\b'
-        eth_pattern = r'\b0x[a-fA-F0-9]{40}\b'
-        if re.search(solana_pattern, text) and Config.CONTRACT_ADDRESS() not in text:
-            return True, "Potential Solana Contract Address"
-        if re.search(eth_pattern, text):
-            return True, "Potential EVM Contract Address"
-            
-        return False, None
+        return self.spam_filter.check(text, strict=strict)
 
     def greet_new_members(self, message):
         try:
-            logger.info("Anggota baru terdeteksi, menunggu 15 detik sebelum menyapa...")
-            time.sleep(15)
-
-            for member in message.new_chat_members:
-                first_name = (member.first_name or "fren").replace('_', '\\_').replace('*', '\\*').replace('[', '\\[').replace('`', '\\`')
-                welcome_text = random.choice(self.responses.get("GREET_NEW_MEMBERS", [])).format(name=f"[{first_name}](tg://user?id={member.id})")
-                try:
-                    self.bot.send_message(message.chat.id, welcome_text, parse_mode="Markdown")
-                    logger.info(f"Sapaan dikirim ke anggota baru: {member.id}")
-                except Exception as e:
-                    logger.error(f"Gagal mengirim pesan selamat datang: {e}")
+            logger.info(f"{len(message.new_chat_members)} anggota baru terdeteksi, digabung dalam jendela {self.GREET_DELAY_SECONDS} detik...")
+            self.join_aggregator.add(message.chat.id, list(message.new_chat_members))
         except Exception as e:
             logger.error(f"Error di greet_new_members: {e}", exc_info=True)
 
+    @staticmethod
+    def _member_mention(member):
+        first_name = (member.first_name or "fren").replace('_', '\\_').replace('*', '\\*').replace('[', '\\[').replace('`', '\\`')
+        return f"[{first_name}](tg://user?id={member.id})"
+
+    def _send_greetings(self, chat_id, members):
+        # Satu sapaan menyebut banyak anggota, dipecah agar tiap pesan di bawah batas panjang Telegram.
+        template = random.choice(self.responses.get("GREET_NEW_MEMBERS", ["Welcome, {name}!"]))
+        budget = self.MAX_MESSAGE_LENGTH - len(template)
+        chunks, current, length = [], [], 0
+        for member in members:
+            mention = self._member_mention(member)
+            if current and length + len(mention) + 2 > budget:
+                chunks.append(current)
+                current, length = [], 0
+            current.append(mention)
+            length += len(mention) + 2
+        if current:
+            chunks.append(current)
+        for mentions in chunks:
+            names = mentions[0] if len(mentions) == 1 else f"{', '.join(mentions[:-1])} & {mentions[-1]}"
+            self.outbound.send_message(chat_id, template.format(name=names), priority=Priority.GREETING, parse_mode="Markdown")
+        logger.info(f"Sapaan untuk {len(members)} anggota baru diantrikan dalam {len(chunks)} pesan.")
+
+    def _handle_join_raid(self, chat_id, count):
+        state = self.chat_states.get(chat_id)
+        now = time.time()
+        already_active = state.raid_until > now
+        state.raid_until = now + self.RAID_MODE_SECONDS
+        if already_active:
+            # Raid berlanjut: cukup perpanjang batas waktu, ringkasan sudah diposting sekali.
+            logger.info(f"Mode raid di chat {chat_id} diperpanjang ({count} anggota baru).")
+            return
+        summary = (f"🐸 Whoa, {count} new frens just hopped into the NPEPEVERSE! Welcome all! 🚀\n\n"
+                   "🛡️ Raid mode is ON: links and contract addresses from members are removed for a while. No spam, no shill, just vibes. 💚")
+        self.outbound.send_message(chat_id, summary, priority=Priority.REPLY)
+        logger.warning(f"Mode raid aktif di chat {chat_id} selama {self.RAID_MODE_SECONDS} detik.")
+
+    def _send_delayed_reply(self, chat_id, category, priority=Priority.REPLY):
+        self.outbound.send_message(chat_id, random.choice(self.responses.get(category, [])), priority=priority)
+
+    def _send_degraded_reply(self, chat_id):
+        """
+        Respons kalengan saat OVERLOADED, paling banyak satu per chat tiap DEGRADED_REPLY_SECONDS dan
+        berprioritas CHATTER: antrian keluar yang memicu degradasi tidak ikut bertambah per pertanyaan.
+        """
+        state = self.chat_states.get(chat_id)
+        now = time.monotonic()
+        if now - state.last_degraded_reply < self.DEGRADED_REPLY_SECONDS:
+            metrics.inc('degraded_reply_total', (('outcome', 'coalesced'),))
+            return
+        state.last_degraded_reply = now
+        metrics.inc('degraded_reply_total', (('outcome', 'sent'),))
+        self._send_delayed_reply(chat_id, "FINAL_FALLBACK", priority=Priority.CHATTER)
+
     def send_welcome(self, message):
+        self.admission.admit('command')
         welcome_text = ("🐸 *Welcome to the official NextPepe ($NPEPE) Bot!* 🔥\n\n"
                         "I am the spirit of the NPEPEVERSE, here to guide you. Use the buttons below or ask me anything!")
+        self.outbound.reply_to(message, welcome_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
+
+    def _is_owner(self, user):
+        return bool(Config.GROUP_OWNER_ID() and user and str(user.id) == str(Config.GROUP_OWNER_ID()))
+
+    def handle_modstats(self, message):
+        """/modstats [jam] — ringkasan moderasi untuk owner, dikirim ke chat pribadi; di grup hanya untuk grup itu."""
+        self.admission.admit('command')
+        if not self._is_owner(message.from_user):
+            return
+        if not self.moderation_log.enabled:
+            self.outbound.reply_to(message, "Moderation log is off (no database).")
+            return
+        parts = (message.text or "").split()
         try:
-            self.bot.reply_to(message, welcome_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
+            hours = float(parts[1]) if len(parts) > 1 else 24.0
+        except ValueError:
+            hours = 24.0
+        chat_id = message.chat.id if message.chat.type in ['group', 'supergroup'] else None
+        if chat_id is not None:
+            self.outbound.reply_to(message, "📬 Moderation stats will be sent to you privately.")
+        # Query DB di thread terpisah agar handler (dan event loop di mode async) tidak menunggu.
+        threading.Thread(target=self._send_modstats, args=(hours, chat_id), name="modstats", daemon=True).start()
+
+    def _send_modstats(self, hours, chat_id):
+        # User_id pelanggar teratas tidak boleh muncul di grup publik: hasil selalu ke chat pribadi owner.
+        owner_chat = Config.GROUP_OWNER_ID()
+        try:
+            summary = self.moderation_log.summary(hours * 3600, chat_id=chat_id)
         except Exception as e:
-            logger.error(f"Gagal mengirim /start: {e}")
+            logger.error(f"Gagal mengambil statistik moderasi: {e}", exc_info=True)
+            self.outbound.send_message(owner_chat, "Could not load moderation stats right now.")
+            return
+        scope = f" in {chat_id}" if chat_id is not None else ""
+        lines = [f"🛡️ Moderation{scope}, last {hours:g}h: {summary['total']} actions"]
+        if summary['by_action']:
+            lines.append("By action: " + ", ".join(f"{action} {count}" for action, count in summary['by_action']))
+        if summary['by_reason']:
+            lines.append("\nTop reasons:")
+            lines.extend(f"• {kind}: {count}" for kind, count in summary['by_reason'])
+        if summary['by_user']:
+            lines.append("\nTop users:")
+            lines.extend(f"• {user_id}: {count}" for user_id, count in summary['by_user'])
+        self.outbound.send_message(owner_chat, "\n".join(lines))
+
+    def handle_profile(self, message):
+        """/profile [30s|500] [all] | stop — profiling sampel untuk owner; ringkasan dikirim ke chat pribadi owner."""
+        self.admission.admit('command')
+        if not self._is_owner(message.from_user):
+            return
+        seconds, updates, all_threads = None, None, False
+        for arg in (message.text or "").split()[1:]:
+            arg = arg.lower()
+            if arg == 'stop':
+                stopped = self.profiler.stop()
+                self.outbound.reply_to(message, "Stopping profiler, report follows." if stopped else "Profiler is not running.")
+                return
+            if arg == 'all':
+                all_threads = True
+            elif arg.endswith('s') and arg[:-1].isdigit():
+                seconds = int(arg[:-1])
+            elif arg.isdigit():
+                updates = int(arg)
+        reply = self.start_profiling(seconds, updates, all_threads)
+        self.outbound.reply_to(message, reply)
+
+    def start_profiling(self, seconds=None, updates=None, all_threads=False):
+        """Dipakai oleh /profile dan rute HTTP; ringkasan selalu dikirim ke chat pribadi owner."""
+        started = self.profiler.start(seconds, updates, all_threads, on_done=self._send_profile_report)
+        if not started:
+            return "Profiler is already running."
+        limit = f" or {updates} updates" if updates else ""
+        return f"🔬 Profiling for up to {self.profiler.seconds:g}s{limit}. Summary will be sent to the owner privately."
+
+    def _send_profile_report(self, report):
+        # Path file dan nama fungsi internal tidak boleh muncul di grup publik.
+        chat_id = Config.GROUP_OWNER_ID()
+        if not chat_id:
+            return
+        lines = [f"🔬 Profile: {report['samples']} samples, {report['updates']} updates, {report['seconds']}s",
+                 f"File: {report['path']}", "\nHot functions (self):"]
+        lines.extend(f"{pct:.1f}% {label}" for label, _, pct in report['top_self'][:10])
+        lines.append("\nCumulative:")
+        lines.extend(f"{pct:.1f}% {label}" for label, _, pct in report['top_cumulative'][:10])
+        self.outbound.send_message(chat_id, "\n".join(lines))
 
     def handle_callback_query(self, call):
+        self.admission.admit('callback')
         try:
             if call.data == "hype":
                 hype_text = random.choice(self.responses.get("HYPE", ["LFG!"]))
-                self.bot.answer_callback_query(call.id, text=hype_text, show_alert=True)
+                self.outbound.answer_callback_query(call.id, text=hype_text, show_alert=True)
             elif call.data == "about":
-                self.bot.answer_callback_query(call.id)
+                self.outbound.answer_callback_query(call.id)
                 about_text = ("🚀 *$NPEPE* is the next evolution of meme power!\n"
                               "We are a community-driven force born on *Pump.fun*.\n\n"
                               "This is 100% pure, unadulterated meme energy. Welcome to the NPEPEVERSE! 🐸")
-                self.bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id, text=about_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
+                self.outbound.edit_message_text(about_text, call.message.chat.id, call.message.message_id, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
             elif call.data == "ca":
-                self.bot.answer_callback_query(call.id)
+                self.outbound.answer_callback_query(call.id)
                 ca_text = f"🔗 *Contract Address:*\n`{Config.CONTRACT_ADDRESS()}`"
-                self.bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id, text=ca_text, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
+                self.outbound.edit_message_text(ca_text, call.message.chat.id, call.message.message_id, reply_markup=self.main_menu_keyboard(), parse_mode="Markdown")
             else:
-                self.bot.answer_callback_query(call.id, text="Action not recognized.")
+                self.outbound.answer_callback_query(call.id, text="Action not recognized.")
         except Exception as e:
             logger.error(f"Error di callback handler: {e}", exc_info=True)
-            try:
-                self.bot.answer_callback_query(call.id, text="Sorry, something went wrong!", show_alert=True)
-            except:
-                pass
-
-    def _is_a_question(self, text):
-        if not text or not isinstance(text, str):
+            self.outbound.answer_callback_query(call.id, text="Sorry, something went wrong!", show_alert=True)
+
+    def _build_intents(self):
+        # Tabel intent: prioritas lebih kecil menang jika beberapa intent cocok.
+        question_pattern = r'\A(?:' + '|'.join(self.QUESTION_WORDS) + r')\b|\?\Z'
+        return [
+            Intent('contract', 10, self._reply_contract, keywords=["ca", "contract", "address"]),
+            Intent('buy', 20, self._reply_buy, keywords=["how to buy", "where to buy", "buy npepe"]),
+            Intent('identity', 30, self._reply_identity, keywords=["what are you", "what is this bot", "are you a bot", "what kind of bot"]),
+            Intent('owner', 40, self._reply_owner, keywords=["owner", "dev", "developer", "creator", "in charge", "who made you"]),
+            Intent('collab', 50, self._reply_collab, keywords=["collab", "collaboration", "partner", "partnership", "promote", "help grow", "shill", "marketing"]),
+            Intent('question', 60, self._reply_ai, pattern=question_pattern, work_class='ai'),
+            Intent('hype', 90, keywords=self.HYPE_KEYWORDS),
+        ]
+
+    def _reply_contract(self, message, text):
+        self.outbound.send_message(message.chat.id, f"Here is the contract address, fren:\n\n`{Config.CONTRACT_ADDRESS()}`", parse_mode="Markdown")
+        return True
+
+    def _reply_buy(self, message, text):
+        self.outbound.send_message(message.chat.id, "💰 You can buy *$NPEPE* on Pump.fun! The portal to the moon is one click away! 🚀", parse_mode="Markdown", reply_markup=self.main_menu_keyboard())
+        return True
+
+    def _reply_identity(self, message, text):
+        chat_id = message.chat.id
+        logger.info(f"Pertanyaan identitas terdeteksi, balasan dijadwalkan {self.IDENTITY_REPLY_DELAY_SECONDS} detik lagi...")
+        self.delayed.schedule(self.IDENTITY_REPLY_DELAY_SECONDS, self._send_delayed_reply, chat_id, "BOT_IDENTITY", key=('identity', chat_id))
+        return True
+
+    def _reply_owner(self, message, text):
+        chat_id = message.chat.id
+        logger.info(f"Pertanyaan owner terdeteksi, balasan dijadwalkan {self.IDENTITY_REPLY_DELAY_SECONDS} detik lagi...")
+        self.delayed.schedule(self.IDENTITY_REPLY_DELAY_SECONDS, self._send_delayed_reply, chat_id, "WHO_IS_OWNER", key=('owner', chat_id))
+        return True
+
+    def _reply_collab(self, message, text):
+        self.outbound.send_message(message.chat.id, random.choice(self.responses.get("COLLABORATION_RESPONSE", [])))
+        return True
+
+    def _reply_ai(self, message, text):
+        if not self.groq_client:
             return False
-        txt = text.strip().lower()
-        if txt.endswith('?'):
-            return True
-        question_words = ['what', 'how', 'when', 'where', 'why', 'who', 'can', 'could', 'is', 'are', 'do', 'does', 'explain']
-        return any(txt.startswith(w) for w in question_words)
+        chat_id = message.chat.id
+        # Pesan "thinking" dikirim paralel dengan panggilan Groq.
+        thinking_future = self.outbound.send_message(chat_id, "🐸 The NPEPE oracle is consulting the memes...")
+        try:
+            if Config.AI_STREAMING():
+                editor = ThrottledEditor(self.outbound, chat_id, thinking_future, min_interval=self.STREAM_EDIT_INTERVAL_SECONDS, min_growth=self.STREAM_EDIT_MIN_GROWTH)
+                ai_response = self.ai_cache.get_or_compute(text, lambda: self._ask_groq_streaming(text, editor.update))
+                editor.wait_pending()
+            else:
+                ai_response = self.ai_cache.get_or_compute(text, lambda: self._ask_groq(text))
+            self._edit_or_send(chat_id, thinking_future, ai_response)
+        except Exception as e:
+            logger.error(f"AI response error: {e}", exc_info=True)
+            fallback = random.choice(self.responses.get("FINAL_FALLBACK", ["Sorry fren, can’t answer now."]))
+            self._edit_or_send(chat_id, thinking_future, fallback)
+        return True
+
+    def _groq_messages(self, text):
+        system_prompt = (
+            "You are a crypto community bot for $NPEPE. Funny, enthusiastic, chaotic. "
+            "Use slang: ‘fren’, ‘WAGMI’, ‘HODL’, ‘based’, ‘LFG’, ‘ribbit’. Keep answers short."
+        )
+        return [{"role": "system", "content": system_prompt}, {"role": "user", "content": text}]
+
+    def _ask_groq(self, text):
+        with metrics.timer('groq_request_seconds', call='answer'):
+            chat_completion = self.groq_client.chat.completions.create(
+                messages=self._groq_messages(text),
+                model="llama3-8b-8192", temperature=0.7, max_tokens=150
+            )
+        return chat_completion.choices[0].message.content
+
+    def _ask_groq_streaming(self, text, on_progress):
+        parts = []
+        with metrics.timer('groq_request_seconds', call='answer_stream'):
+            stream = self.groq_client.chat.completions.create(
+                messages=self._groq_messages(text),
+                model="llama3-8b-8192", temperature=0.7, max_tokens=150, stream=True
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_progress("".join(parts))
+        return "".join(parts)
+
+    def _edit_or_send(self, chat_id, message_future, text):
+        """
+        Mengedit pesan "thinking" begitu terkirim; jika pesan itu gagal dikirim atau diedit, kirim pesan baru.
+        Dirangkai lewat callback Future sehingga thread handler tidak menunggu antrian keluar.
+        """
+        def _fallback(edit_future):
+            if edit_future.exception() is not None:
+                self.outbound.send_message(chat_id, text)
+
+        def _edit(sent_future):
+            sent = sent_future.result() if not sent_future.cancelled() and sent_future.exception() is None else None
+            if sent is None:
+                self.outbound.send_message(chat_id, text)
+                return
+            self.outbound.edit_message_text(text, chat_id, sent.message_id).add_done_callback(_fallback)
+
+        message_future.add_done_callback(_edit)
 
     def handle_all_text(self, message):
         try:
@@ -298,20 +591,29 @@ class BotLogic:
             if message.chat.type in ['group', 'supergroup']:
                 chat_id = message.chat.id
                 user_id = message.from_user.id
-                self._update_admin_ids(chat_id)
-                
-                is_exempt = user_id in self.admin_ids
+                is_exempt = self.admin_cache.is_admin(chat_id, user_id)
                 if Config.GROUP_OWNER_ID() and str(user_id) == str(Config.GROUP_OWNER_ID()):
                     is_exempt = True
 
+                # Flood diperiksa sebelum regex atau Groq agar pesan banjir tidak memakan kerja apa pun.
+                if not is_exempt and not self.flood_control.allow(chat_id, user_id):
+                    metrics.inc('moderation_total', (('action', 'flood'),))
+                    self.admission.admit('moderation')
+                    self.moderation_log.record(chat_id, user_id, message.message_id, 'flood_delete' if Config.FLOOD_DELETE() else 'flood_ignore', "Flood")
+                    if Config.FLOOD_DELETE():
+                        self.outbound.delete_message(chat_id, message.message_id)
+                    return
+
                 if not is_exempt:
-                    is_spam, reason = self._is_spam_or_ad(message)
+                    is_spam, reason = self._is_spam_or_ad(message, strict=self.chat_states.get(chat_id).in_raid_mode())
+                    if not is_spam:
+                        is_spam, reason = self.duplicate_detector.check(chat_id, user_id, message.text or message.caption or "")
                     if is_spam:
-                        try:
-                            self.bot.delete_message(chat_id, message.message_id)
-                            logger.info(f"Deleted message {message.message_id} from {user_id} reason: {reason}")
-                        except Exception as e:
-                            logger.error(f"Gagal menghapus pesan spam: {e}")
+                        metrics.inc('moderation_total', (('action', 'delete'),))
+                        self.admission.admit('moderation')
+                        self.moderation_log.record(chat_id, user_id, message.message_id, 'delete', reason)
+                        self.outbound.delete_message(chat_id, message.message_id)
+                        logger.info(f"Deleted message {message.message_id} from {user_id} reason: {reason}")
                         return
             
             text = (message.text or message.caption or "")
@@ -324,82 +626,52 @@ class BotLogic:
                 for entity in message.entities:
                     if getattr(entity, 'type', None) == 'text_mention' and getattr(entity, 'user', None):
                         if str(entity.user.id) == str(Config.GROUP_OWNER_ID()):
-                            self.bot.send_message(chat_id, random.choice(self.responses.get("WHO_IS_OWNER", [])))
+                            self.outbound.send_message(chat_id, random.choice(self.responses.get("WHO_IS_OWNER", [])))
                             return
             
-            if any(kw in lower_text for kw in ["ca", "contract", "address"]):
-                self.bot.send_message(chat_id, f"Here is the contract address, fren:\n\n`{Config.CONTRACT_ADDRESS()}`", parse_mode="Markdown")
-                return
-            if any(kw in lower_text for kw in ["how to buy", "where to buy", "buy npepe"]):
-                self.bot.send_message(chat_id, "💰 You can buy *$NPEPE* on Pump.fun! The portal to the moon is one click away! 🚀", parse_mode="Markdown", reply_markup=self.main_menu_keyboard())
-                return
-            
-            if any(kw in lower_text for kw in ["what are you", "what is this bot", "are you a bot", "what kind of bot"]):
-                logger.info("Pertanyaan identitas terdeteksi, menunggu 20 detik...")
-                time.sleep(20)
-                self.bot.send_message(chat_id, random.choice(self.responses.get("BOT_IDENTITY", [])))
-                return
-            if any(kw in lower_text for kw in ["owner", "dev", "creator", "in charge", "who made you"]):
-                logger.info("Pertanyaan owner terdeteksi, menunggu 20 detik...")
-                time.sleep(20)
-                self.bot.send_message(chat_id, random.choice(self.responses.get("WHO_IS_OWNER", [])))
-                return
-            
-            if any(kw in lower_text for kw in ["collab", "partner", "promote", "help grow", "shill", "marketing"]):
-                self.bot.send_message(chat_id, random.choice(self.responses.get("COLLABORATION_RESPONSE", [])))
-                return
-
-            if self.groq_client and self._is_a_question(text):
-                thinking_message = None
-                try:
-                    thinking_message = self.bot.send_message(chat_id, "🐸 The NPEPE oracle is consulting the memes...")
-                    system_prompt = (
-                        "You are a crypto community bot for $NPEPE. Funny, enthusiastic, chaotic. "
-                        "Use slang: ‘fren’, ‘WAGMI’, ‘HODL’, ‘based’, ‘LFG’, ‘ribbit’. Keep answers short."
-                    )
-                    chat_completion = self.groq_client.chat.completions.create(
-                        messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": text}],
-                        model="llama3-8b-8192", temperature=0.7, max_tokens=150
-                    )
-                    ai_response = chat_completion.choices[0].message.content
-                    try:
-                        self.bot.edit_message_text(ai_response, chat_id=chat_id, message_id=thinking_message.message_id)
-                    except Exception:
-                        self.bot.send_message(chat_id, ai_response)
-                except Exception as e:
-                    logger.error(f"AI response error: {e}", exc_info=True)
-                    fallback = random.choice(self.responses.get("FINAL_FALLBACK", ["Sorry fren, can’t answer now."]))
-                    try:
-                        if thinking_message: self.bot.edit_message_text(fallback, chat_id=chat_id, message_id=thinking_message.message_id)
-                        else: self.bot.send_message(chat_id, fallback)
-                    except Exception as ex:
-                        logger.error(f"Gagal mengirim fallback: {ex}")
-                return
+            intent, matched = self.intent_router.classify(lower_text)
+            if intent:
+                metrics.inc('intent_total', (('intent', intent.name),))
+            if intent and intent.handler:
+                decision = self.admission.admit(intent.work_class)
+                if decision == Admission.DEGRADE:
+                    # Bot jenuh: jawab dengan respons kalengan alih-alih memanggil Groq.
+                    self._send_degraded_reply(chat_id)
+                    return
+                if decision == Admission.SHED:
+                    return
+                logger.debug(f"Intent terdeteksi: {intent.name} (cocok: {sorted(matched)})")
+                if intent.handler(message, text):
+                    return
 
             if message.chat.type in ['group', 'supergroup']:
+                state = self.chat_states.get(chat_id)
                 now_ts = time.time()
-                if now_ts - self.last_random_reply_time < self.COOLDOWN_SECONDS:
+                if state.in_raid_mode(now_ts) or now_ts - state.last_random_reply_time < state.cooldown_seconds:
                     return
                 
-                current_chance = self.BASE_REPLY_CHANCE
-                if any(hype_word in lower_text for hype_word in self.HYPE_KEYWORDS):
-                    current_chance = self.HYPE_REPLY_CHANCE
+                current_chance = state.base_reply_chance
+                if 'hype' in matched:
+                    current_chance = state.hype_reply_chance
                 
                 if random.random() < current_chance:
-                    try:
-                        logger.info("Memutuskan untuk membalas hype, menunggu 15 detik...")
-                        time.sleep(15)
-                        self.bot.send_message(chat_id, random.choice(self.responses.get("HYPE", ["LFG!"])))
-                        self.last_random_reply_time = now_ts
-                    except Exception as e:
-                        logger.error(f"Gagal mengirim pesan hype: {e}")
+                    if self.admission.admit('hype') == Admission.SHED:
+                        return
+                    if self.scale_out and not self.shared_state.claim_cooldown(f"hype:{chat_id}", state.cooldown_seconds):
+                        # Replika lain baru saja membalas di chat ini.
+                        state.last_random_reply_time = now_ts
+                        return
+                    # Cooldown dihitung sejak balasan dijadwalkan agar tidak ada dua balasan hype yang tertunda.
+                    logger.info(f"Memutuskan untuk membalas hype, dijadwalkan {self.HYPE_REPLY_DELAY_SECONDS} detik lagi...")
+                    state.last_random_reply_time = now_ts
+                    self.delayed.schedule(self.HYPE_REPLY_DELAY_SECONDS, self._send_delayed_reply, chat_id, "HYPE", Priority.CHATTER, key=('hype', chat_id))
 
         except Exception as e:
             logger.error(f"FATAL ERROR memproses pesan: {e}", exc_info=True)
 
     def send_scheduled_greeting(self, time_of_day):
-        group_id = Config.GROUP_CHAT_ID()
-        if not group_id: return
+        group_ids = self.chat_states.schedule_targets()
+        if not group_ids: return
         
         greetings = {
             'morning': self.responses.get("MORNING_GREETING", []),
@@ -409,60 +681,83 @@ class BotLogic:
         }
         message_list = greetings.get(time_of_day, ["Keep the hype alive!"])
         if message_list:
-            message = random.choice(message_list)
-            try:
-                self.bot.send_message(group_id, message)
-                logger.info(f"Mengirim sapaan terjadwal ({time_of_day}) ke {group_id}")
-            except Exception as e:
-                logger.error(f"Gagal mengirim sapaan {time_of_day}: {e}", exc_info=True)
+            for group_id in group_ids:
+                message = random.choice(message_list)
+                self.outbound.send_message(group_id, message, priority=Priority.CHATTER)
+            logger.info(f"Mengirim sapaan terjadwal ({time_of_day}) ke {len(group_ids)} grup")
 
     def send_scheduled_wisdom(self):
-        group_id = Config.GROUP_CHAT_ID()
-        if not group_id: return
+        group_ids = self.chat_states.schedule_targets()
+        if not group_ids: return
         
         wisdom_list = self.responses.get("WISDOM", [])
         if wisdom_list:
-            wisdom = random.choice(wisdom_list)
-            message = f"**🐸 Daily Dose of NPEPE Wisdom 📜**\n\n_{wisdom}_"
-            try:
-                self.bot.send_message(group_id, message, parse_mode="Markdown")
-                logger.info("Mengirim kebijaksanaan terjadwal.")
-            except Exception as e:
-                logger.error(f"Gagal mengirim kebijaksanaan terjadwal: {e}")
+            for group_id in group_ids:
+                wisdom = random.choice(wisdom_list)
+                message = f"**🐸 Daily Dose of NPEPE Wisdom 📜**\n\n_{wisdom}_"
+                self.outbound.send_message(group_id, message, priority=Priority.CHATTER, parse_mode="Markdown")
+            logger.info(f"Mengirim kebijaksanaan terjadwal ke {len(group_ids)} grup.")
 
     def renew_responses_with_ai(self):
         logger.info("Memulai proses pembaruan respons mingguan oleh AI.")
         if not self.groq_client:
             logger.warning("Melewatkan pembaruan AI: Groq tidak diinisialisasi.")
             return
+        if not self._renewal_lock.acquire(blocking=False):
+            logger.info("Pembaruan AI sudah berjalan, permintaan baru dilewati.")
+            return
+        # Enam panggilan Groq berjalan di latar belakang, bukan di jalur request.
+        threading.Thread(target=self._renew_responses_worker, name="response-renewal", daemon=True).start()
 
-        categories_to_renew = {
-            "HYPE": ("Produce 100 short hype messages for a meme coin bot. Funny, enthusiastic, use slang like LFG, WAGMI, ribbit, fren. Each 5-30 words.", 50),
-            "WISDOM": ("Produce 20 wise, motivational quotes for a crypto community. Meme-themed, short, inspiring about HODL, community, moon.", 10),
-            "MORNING_GREETING": ("Produce 20 unique 'good morning' greetings for a crypto community. Energetic, funny, meme-themed.", 10),
-            "NOON_GREETING": ("Produce 20 unique 'midday' check-in messages for a crypto community. Motivational, keep the energy high.", 10),
-            "NIGHT_GREETING": ("Produce 20 unique 'good night' messages for a crypto community. Calming, but bullish for tomorrow.", 10),
-            "GREET_NEW_MEMBERS": ("Produce 20 unique welcome messages for new members in a crypto group. Must include the placeholder '{name}'. Friendly and exciting.", 10)
-        }
+    def _renewable_only(self, stored):
+        return {category: lines for category, lines in stored.items()
+                if category in self.RENEWABLE_CATEGORIES and isinstance(lines, list) and lines}
+
+    def _renew_responses_worker(self):
+        categories_to_renew = self.RENEWABLE_CATEGORIES
+        try:
+            renewed = {}
+            with ThreadPoolExecutor(max_workers=len(categories_to_renew), thread_name_prefix="renewal") as pool:
+                futures = {pool.submit(self._renew_category, category, prompt, min_count): category
+                           for category, (prompt, min_count) in categories_to_renew.items()}
+                for future in as_completed(futures):
+                    new_lines = future.result()
+                    if new_lines:
+                        renewed[futures[future]] = new_lines
+
+            if renewed:
+                updated = dict(self.responses)
+                updated.update(renewed)
+                self.responses = updated
+                # Versi tersimpan memuat semua kategori AI: hasil sebelumnya ditimpa yang baru diperbarui.
+                _, stored = self.response_store.load_latest()
+                persisted = self._renewable_only(stored or {})
+                persisted.update(renewed)
+                self.response_store.save(persisted)
+            logger.info(f"Pembaruan AI selesai: {len(renewed)}/{len(categories_to_renew)} kategori diperbarui.")
+        except Exception as e:
+            logger.error(f"❌ Pembaruan respons AI gagal: {e}", exc_info=True)
+        finally:
+            self._renewal_lock.release()
 
-        for category, (prompt, min_count) in categories_to_renew.items():
-            try:
-                logger.info(f"Meminta AI untuk memperbarui kategori: {category}...")
+    def _renew_category(self, category, prompt, min_count):
+        try:
+            logger.info(f"Meminta AI untuk memperbarui kategori: {category}...")
+            with metrics.timer('groq_request_seconds', call='renewal'):
                 completion = self.groq_client.chat.completions.create(
                     messages=[{"role": "system", "content": prompt}],
                     model="llama3-8b-8192", temperature=1.0, max_tokens=2000
                 )
-                text = completion.choices[0].message.content
-                new_lines = [line.strip() for line in re.split(r'\n|\d+\.', text) if line.strip() and len(line) > 5]
-                
-                if category == "GREET_NEW_MEMBERS":
-                    new_lines = [line for line in new_lines if '{name}' in line]
-
-                if len(new_lines) >= min_count:
-                    self.responses[category] = new_lines
-                    logger.info(f"✅ Kategori '{category}' berhasil diperbarui oleh AI dengan {len(new_lines)} entri baru.")
-                else:
-                    logger.warning(f"⚠️ Pembaruan AI untuk '{category}' hanya menghasilkan {len(new_lines)} baris (butuh {min_count}); pembaruan dilewati.")
-            except Exception as e:
-                logger.error(f"❌ Gagal memperbarui kategori '{category}' dengan AI: {e}", exc_info=True)
+            text = completion.choices[0].message.content
+            new_lines = [line.strip() for line in re.split(r'\n|\d+\.', text) if line.strip() and len(line) > 5]
+            
+            if category == "GREET_NEW_MEMBERS":
+                new_lines = [line for line in new_lines if '{name}' in line]
 
+            if len(new_lines) >= min_count:
+                logger.info(f"✅ Kategori '{category}' berhasil diperbarui oleh AI dengan {len(new_lines)} entri baru.")
+                return new_lines
+            logger.warning(f"⚠️ Pembaruan AI untuk '{category}' hanya menghasilkan {len(new_lines)} baris (butuh {min_count}); pembaruan dilewati.")
+        except Exception as e:
+            logger.error(f"❌ Gagal memperbarui kategori '{category}' dengan AI: {e}", exc_info=True)
+        return None
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ChatState:
+    """State percakapan satu chat. Memakai __slots__ agar ribuan grup tetap hemat memori."""
+    __slots__ = ('chat_id', 'last_random_reply_time', 'cooldown_seconds', 'base_reply_chance',
+                 'hype_reply_chance', 'schedule_target', 'last_seen', 'raid_until', 'last_degraded_reply')
+
+    def __init__(self, chat_id, cooldown_seconds, base_reply_chance, hype_reply_chance, schedule_target=False):
+        self.chat_id = chat_id
+        self.last_random_reply_time = 0.0
+        self.cooldown_seconds = cooldown_seconds
+        self.base_reply_chance = base_reply_chance
+        self.hype_reply_chance = hype_reply_chance
+        self.schedule_target = schedule_target
+        self.last_seen = time.monotonic()
+        self.raid_until = 0.0
+        self.last_degraded_reply = 0.0
+
+    def in_raid_mode(self, now=None):
+        return (now or time.time()) < self.raid_until
+
+
+class ChatStateStore:
+    """
+    Penyimpanan state per chat (dict berurutan LRU) dengan penggusuran chat yang menganggur.
+    Chat tujuan postingan terjadwal dipin dan tidak pernah digusur.
+    """
+    def __init__(self, cooldown_seconds, base_reply_chance, hype_reply_chance, schedule_targets=(), idle_seconds=6 * 3600, max_chats=10000):
+        self.defaults = (cooldown_seconds, base_reply_chance, hype_reply_chance)
+        self.idle_seconds = idle_seconds
+        self.max_chats = max(1, int(max_chats))
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        for chat_id in schedule_targets:
+            self._states[chat_id] = ChatState(chat_id, *self.defaults, schedule_target=True)
+
+    def get(self, chat_id):
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(chat_id)
+            if state is None:
+                state = self._states[chat_id] = ChatState(chat_id, *self.defaults)
+                self._evict(now)
+            else:
+                self._states.move_to_end(chat_id)
+            state.last_seen = now
+            return state
+
+    def _evict(self, now):
+        # Chat paling lama tidak aktif ada di depan; berhenti di chat aktif pertama.
+        checked = 0
+        while self._states and checked < len(self._states):
+            chat_id, state = next(iter(self._states.items()))
+            over_capacity = len(self._states) > self.max_chats
+            if not over_capacity and now - state.last_seen < self.idle_seconds:
+                break
+            checked += 1
+            if state.schedule_target:
+                self._states.move_to_end(chat_id)
+                continue
+            del self._states[chat_id]
+            self.evictions += 1
+
+    def schedule_targets(self):
+        with self._lock:
+            return [state.chat_id for state in self._states.values() if state.schedule_target]
+
+    def __len__(self):
+        return len(self._states)
+
+    def snapshot(self):
+        return {'chats': len(self._states), 'evictions': self.evictions, 'schedule_targets': len(self.schedule_targets())}
@@ -15,6 +15,9 @@ class Config:
     @staticmethod
     def GROQ_API_KEY(): return os.environ.get("GROQ_API_KEY")
     
+    @staticmethod
+    def GROQ_BASE_URL(): return os.environ.get("GROQ_BASE_URL") or None
+    
     @staticmethod
     def GROUP_CHAT_ID(): return os.environ.get("GROUP_CHAT_ID")
     
@@ -38,3 +41,153 @@ class Config:
     
     @staticmethod
     def TWITTER_URL(): return os.environ.get("TWITTER_URL", "https://x.com/NPEPE_Verse")
+
+    @staticmethod
+    def WAITRESS_THREADS(): return int(os.environ.get("WAITRESS_THREADS", 4))
+    
+    @staticmethod
+    def DB_POOL_SIZE():
+        # Default: satu koneksi per thread waitress ditambah cadangan untuk tugas latar belakang.
+        return int(os.environ.get("DB_POOL_SIZE", Config.WAITRESS_THREADS() + 2))
+    
+    @staticmethod
+    def WEBHOOK_FAST_ACK(): return os.environ.get("WEBHOOK_FAST_ACK", "false").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def UPDATE_WORKERS(): return int(os.environ.get("UPDATE_WORKERS", 4))
+    
+    @staticmethod
+    def UPDATE_QUEUE_SIZE(): return int(os.environ.get("UPDATE_QUEUE_SIZE", 1000))
+    
+    @staticmethod
+    def OUTBOUND_WORKERS(): return int(os.environ.get("OUTBOUND_WORKERS", 4))
+    
+    @staticmethod
+    def OUTBOUND_GLOBAL_RATE(): return float(os.environ.get("OUTBOUND_GLOBAL_RATE", 30))
+    
+    @staticmethod
+    def OUTBOUND_CHAT_RATE(): return float(os.environ.get("OUTBOUND_CHAT_RATE", 1))
+    
+    @staticmethod
+    def AI_CACHE_SIZE(): return int(os.environ.get("AI_CACHE_SIZE", 500))
+    
+    @staticmethod
+    def AI_CACHE_TTL(): return int(os.environ.get("AI_CACHE_TTL", 3600))
+    
+    @staticmethod
+    def AI_STREAMING(): return os.environ.get("AI_STREAMING", "false").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def SCHEDULER_ENABLED(): return os.environ.get("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def SCALE_OUT(): return os.environ.get("SCALE_OUT", "false").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def ADMIN_CACHE_MAX_CHATS(): return int(os.environ.get("ADMIN_CACHE_MAX_CHATS", 1000))
+    
+    @staticmethod
+    def SCHEDULE_CHAT_IDS():
+        # GROUP_CHAT_ID ditambah daftar opsional GROUP_CHAT_IDS (dipisah koma) untuk postingan terjadwal.
+        raw = [Config.GROUP_CHAT_ID() or ""] + os.environ.get("GROUP_CHAT_IDS", "").split(",")
+        chat_ids = []
+        for value in (v.strip() for v in raw):
+            if not value:
+                continue
+            chat_id = int(value) if value.lstrip('-').isdigit() else value
+            if chat_id not in chat_ids:
+                chat_ids.append(chat_id)
+        return chat_ids
+    
+    @staticmethod
+    def CHAT_STATE_MAX_CHATS(): return int(os.environ.get("CHAT_STATE_MAX_CHATS", 10000))
+    
+    @staticmethod
+    def JOIN_WINDOW_SECONDS(): return float(os.environ.get("JOIN_WINDOW_SECONDS", 15))
+    
+    @staticmethod
+    def JOIN_RAID_THRESHOLD(): return int(os.environ.get("JOIN_RAID_THRESHOLD", 20))
+    
+    @staticmethod
+    def RAID_MODE_SECONDS(): return int(os.environ.get("RAID_MODE_SECONDS", 600))
+    
+    @staticmethod
+    def FLOOD_RATE(): return float(os.environ.get("FLOOD_RATE", 1))
+    
+    @staticmethod
+    def FLOOD_BURST(): return float(os.environ.get("FLOOD_BURST", 5))
+    
+    @staticmethod
+    def FLOOD_DELETE(): return os.environ.get("FLOOD_DELETE", "true").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def DUPLICATE_WINDOW_SECONDS(): return int(os.environ.get("DUPLICATE_WINDOW_SECONDS", 600))
+    
+    @staticmethod
+    def DUPLICATE_MIN_USERS(): return int(os.environ.get("DUPLICATE_MIN_USERS", 3))
+    
+    @staticmethod
+    def DUPLICATE_MIN_TOKENS(): return int(os.environ.get("DUPLICATE_MIN_TOKENS", 8))
+    
+    @staticmethod
+    def ASYNC_MAX_INFLIGHT(): return int(os.environ.get("ASYNC_MAX_INFLIGHT", 500))
+    
+    @staticmethod
+    def AI_CONCURRENCY(): return int(os.environ.get("AI_CONCURRENCY", 16))
+    
+    @staticmethod
+    def HTTP_MAX_CONNECTIONS(): return int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+    
+    @staticmethod
+    def INGESTION_MODE(): return os.environ.get("INGESTION_MODE", "webhook").strip().lower()
+    
+    @staticmethod
+    def POLLING_TIMEOUT(): return int(os.environ.get("POLLING_TIMEOUT", 30))
+    
+    @staticmethod
+    def POLLING_BATCH_SIZE(): return max(1, min(100, int(os.environ.get("POLLING_BATCH_SIZE", 100))))
+    
+    @staticmethod
+    def FAST_START(): return os.environ.get("FAST_START", "false").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def ADMISSION_ENABLED(): return os.environ.get("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def ADMISSION_BUSY_INFLIGHT():
+        # Default: tiga perempat dari thread yang bisa menjalankan handler.
+        value = int(os.environ.get("ADMISSION_BUSY_INFLIGHT", 0))
+        return value or max(1, (Config.HANDLER_CAPACITY() * 3) // 4)
+    
+    @staticmethod
+    def ADMISSION_OVERLOAD_INFLIGHT():
+        value = int(os.environ.get("ADMISSION_OVERLOAD_INFLIGHT", 0))
+        return value or Config.HANDLER_CAPACITY()
+    
+    @staticmethod
+    def HANDLER_CAPACITY():
+        return Config.WAITRESS_THREADS() + (Config.UPDATE_WORKERS() if Config.WEBHOOK_FAST_ACK() else 0)
+    
+    @staticmethod
+    def ADMISSION_BUSY_QUEUE_AGE(): return float(os.environ.get("ADMISSION_BUSY_QUEUE_AGE", 5))
+    
+    @staticmethod
+    def ADMISSION_OVERLOAD_QUEUE_AGE(): return float(os.environ.get("ADMISSION_OVERLOAD_QUEUE_AGE", 15))
+    
+    @staticmethod
+    def MODLOG_BATCH_SIZE(): return int(os.environ.get("MODLOG_BATCH_SIZE", 200))
+    
+    @staticmethod
+    def MODLOG_FLUSH_SECONDS(): return float(os.environ.get("MODLOG_FLUSH_SECONDS", 10))
+    
+    @staticmethod
+    def MODLOG_MAX_BUFFER(): return int(os.environ.get("MODLOG_MAX_BUFFER", 10000))
+    
+    @staticmethod
+    def PROFILE_DIR(): return os.environ.get("PROFILE_DIR", "/tmp/npepe-profiles")
+    
+    @staticmethod
+    def PROFILE_INTERVAL_MS(): return max(1.0, float(os.environ.get("PROFILE_INTERVAL_MS", 5)))
+    
+    @staticmethod
+    def PROFILE_MAX_SECONDS(): return int(os.environ.get("PROFILE_MAX_SECONDS", 300))
@@ -0,0 +1,235 @@
+import importlib.util
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# psycopg2 baru diimpor saat koneksi pertama dibuat, agar cold start tidak menanggung biayanya.
+PSYCOPG2_INSTALLED = importlib.util.find_spec("psycopg2") is not None
+if not PSYCOPG2_INSTALLED:
+    logging.critical("DIAGNOSTIK: KRITIS - pustaka 'psycopg2' tidak ditemukan. Persistensi akan dinonaktifkan.")
+_psycopg2 = None
+
+
+def _driver():
+    global _psycopg2
+    if _psycopg2 is None:
+        import psycopg2
+        _psycopg2 = psycopg2
+    return _psycopg2
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class Database:
+    """
+    Lapisan akses Postgres dengan pool koneksi yang terbatas dan thread-safe.
+    Koneksi divalidasi saat diambil, dibuat ulang jika rusak, dan setiap koneksi
+    menyimpan prepared statement-nya sendiri (lihat STATEMENTS).
+    """
+    # Nama -> (definisi PREPARE, jumlah parameter)
+    STATEMENTS = {
+        'schedule_select_all': ("SELECT task_name, last_run_date FROM schedule_log", 0),
+        'schedule_upsert': ("INSERT INTO schedule_log (task_name, last_run_date) VALUES ($1, $2) ON CONFLICT (task_name) DO UPDATE SET last_run_date = EXCLUDED.last_run_date", 2),
+        'schedule_claim': ("INSERT INTO schedule_log (task_name, last_run_date) VALUES ($1::text, $2::text) ON CONFLICT (task_name) DO UPDATE SET last_run_date = EXCLUDED.last_run_date WHERE schedule_log.last_run_date IS DISTINCT FROM EXCLUDED.last_run_date RETURNING task_name", 2),
+        'cooldown_claim': ("INSERT INTO bot_cooldowns (scope, until) VALUES ($1::text, now() + $2::double precision * interval '1 second') ON CONFLICT (scope) DO UPDATE SET until = EXCLUDED.until WHERE bot_cooldowns.until <= now() RETURNING scope", 2),
+        'admins_select': ("SELECT admin_ids FROM chat_admins WHERE chat_id = $1::bigint AND updated_at > now() - $2::double precision * interval '1 second'", 2),
+        'admins_upsert': ("INSERT INTO chat_admins (chat_id, admin_ids, updated_at) VALUES ($1::bigint, $2::bigint[], now()) ON CONFLICT (chat_id) DO UPDATE SET admin_ids = EXCLUDED.admin_ids, updated_at = EXCLUDED.updated_at", 2),
+        'responses_latest': ("SELECT version, responses FROM response_versions ORDER BY version DESC LIMIT 1", 0),
+        'responses_insert': ("INSERT INTO response_versions (responses) VALUES ($1::jsonb) RETURNING version", 1),
+        'offset_select': ("SELECT next_offset FROM polling_offsets WHERE bot_id = $1::bigint", 1),
+        'offset_upsert': ("INSERT INTO polling_offsets (bot_id, next_offset, updated_at) VALUES ($1::bigint, $2::bigint, now()) ON CONFLICT (bot_id) DO UPDATE SET next_offset = GREATEST(polling_offsets.next_offset, EXCLUDED.next_offset), updated_at = EXCLUDED.updated_at", 2),
+    }
+    # Koneksi yang menganggur lebih lama dari ini di-ping dulu sebelum dipakai.
+    VALIDATE_AFTER_IDLE_SECONDS = 30
+    CHECKOUT_TIMEOUT_SECONDS = 10
+
+    def __init__(self, dsn, max_size=5):
+        self.dsn = dsn
+        self.max_size = max(1, int(max_size))
+        self._idle = []  # [(conn, waktu_kembali)]
+        self._prepared = {}  # id(conn) -> set nama statement
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {'created': 0, 'reconnects': 0, 'waits': 0, 'timeouts': 0, 'checkouts': 0}
+
+    @property
+    def available(self):
+        return bool(self.dsn and PSYCOPG2_INSTALLED)
+
+    # --- Manajemen pool ---
+
+    def _create(self):
+        conn = _driver().connect(self.dsn)
+        self._prepared[id(conn)] = set()
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        self._prepared.pop(id(conn), None)
+        try: conn.close()
+        except: pass
+
+    def _is_alive(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.time() - idle_since < self.VALIDATE_AFTER_IDLE_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        started = time.perf_counter()
+        try:
+            return self._checkout_connection()
+        finally:
+            metrics.observe('db_checkout_seconds', (), time.perf_counter() - started)
+
+    def _checkout_connection(self):
+        deadline = time.time() + self.CHECKOUT_TIMEOUT_SECONDS
+        with self._cond:
+            self._stats['checkouts'] += 1
+            waited = False
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolExhausted(f"Tidak ada koneksi DB tersedia setelah {self.CHECKOUT_TIMEOUT_SECONDS} detik")
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            if self._idle:
+                conn, idle_since = self._idle.pop()
+            else:
+                conn, idle_since = None, None
+                self._size += 1
+
+        try:
+            if conn is not None and not self._is_alive(conn, idle_since):
+                logger.warning("Koneksi DB dari pool rusak, membuat ulang.")
+                self._discard(conn)
+                conn = None
+                with self._cond:
+                    self._stats['reconnects'] += 1
+            if conn is None:
+                conn = self._create()
+            return conn
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, conn, broken=False):
+        with self._cond:
+            if broken or conn.closed:
+                self._size -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.time()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Meminjam koneksi dari pool. Commit saat sukses, rollback saat error."""
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            if _psycopg2 and isinstance(e, (_psycopg2.OperationalError, _psycopg2.InterfaceError)):
+                broken = True
+            try: conn.rollback()
+            except Exception: broken = True
+            raise
+        finally:
+            self._checkin(conn, broken=broken)
+
+    # --- Prepared statement ---
+
+    def _ensure_prepared(self, conn, cursor, name):
+        prepared = self._prepared.setdefault(id(conn), set())
+        if name in prepared:
+            return
+        sql, _ = self.STATEMENTS[name]
+        cursor.execute(f"PREPARE {name} AS {sql}")
+        prepared.add(name)
+
+    def _run_prepared(self, name, params, fetch):
+        sql, arg_count = self.STATEMENTS[name]
+        if len(params) != arg_count:
+            raise ValueError(f"Statement '{name}' butuh {arg_count} parameter, diberikan {len(params)}")
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = self._execute_prepared(name, params, arg_count, fetch)
+            outcome = 'ok'
+            return result
+        finally:
+            metrics.observe('db_query_seconds', (('outcome', outcome), ('statement', name)), time.perf_counter() - started)
+
+    def _execute_prepared(self, name, params, arg_count, fetch):
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                self._ensure_prepared(conn, cursor, name)
+                if arg_count:
+                    placeholders = ", ".join(["%s"] * arg_count)
+                    cursor.execute(f"EXECUTE {name} ({placeholders})", tuple(params))
+                else:
+                    cursor.execute(f"EXECUTE {name}")
+                return cursor.fetchall() if fetch else cursor.rowcount
+
+    def fetch_prepared(self, name, params=()):
+        return self._run_prepared(name, params, fetch=True)
+
+    def execute_prepared(self, name, params=()):
+        return self._run_prepared(name, params, fetch=False)
+
+    def execute(self, sql, params=None):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    rowcount = cursor.rowcount
+            outcome = 'ok'
+            return rowcount
+        finally:
+            metrics.observe('db_query_seconds', (('outcome', outcome), ('statement', 'sql')), time.perf_counter() - started)
+
+    def execute_values(self, sql, rows, template=None, page_size=500):
+        """Insert banyak baris dalam satu perintah multi-VALUES (psycopg2.extras.execute_values)."""
+        from psycopg2.extras import execute_values
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    execute_values(cursor, sql, rows, template=template, page_size=page_size)
+            outcome = 'ok'
+            return len(rows)
+        finally:
+            metrics.observe('db_query_seconds', (('outcome', outcome), ('statement', 'batch')), time.perf_counter() - started)
+
+    # --- Observabilitas ---
+
+    def stats(self):
+        with self._cond:
+            in_use = self._size - len(self._idle)
+            return dict(self._stats, size=self._size, idle=len(self._idle), in_use=in_use, max_size=self.max_size)
+
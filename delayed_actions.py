@@ -0,0 +1,99 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DelayedAction:
+    __slots__ = ('due', 'func', 'args', 'kwargs', 'key', 'cancelled')
+
+    def __init__(self, due, func, args, kwargs, key):
+        self.due = due
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DelayedActions:
+    """
+    Mesin aksi tertunda: satu thread timer dengan min-heap.
+    Handler cukup memanggil schedule(...) lalu langsung kembali; penundaan 15 detik
+    tidak lagi menahan thread server. Aksi dengan 'key' yang sama digabung (coalesce)
+    sehingga hanya ada satu aksi tertunda per key, misalnya per chat.
+    """
+    def __init__(self, name="delayed-actions"):
+        self._heap = []
+        self._pending = {}  # key -> DelayedAction
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._started = False
+
+    def start(self):
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        self._thread.start()
+
+    def schedule(self, delay, func, *args, key=None, replace=False, **kwargs):
+        """
+        Menjadwalkan func(*args, **kwargs) setelah 'delay' detik.
+        Jika 'key' sudah punya aksi tertunda, aksi lama dipertahankan (atau diganti
+        jika replace=True). Mengembalikan DelayedAction yang bisa dibatalkan.
+        """
+        self.start()
+        with self._cond:
+            existing = self._pending.get(key) if key is not None else None
+            if existing and not existing.cancelled:
+                if not replace:
+                    return existing
+                existing.cancel()
+            action = DelayedAction(time.monotonic() + max(0.0, delay), func, args, kwargs, key)
+            if key is not None:
+                self._pending[key] = action
+            heapq.heappush(self._heap, (action.due, next(self._counter), action))
+            self._cond.notify()
+            return action
+
+    def cancel(self, key):
+        with self._cond:
+            action = self._pending.pop(key, None)
+            if action:
+                action.cancel()
+                return True
+            return False
+
+    def pending(self):
+        with self._cond:
+            return sum(1 for _, _, action in self._heap if not action.cancelled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    # Buang aksi yang sudah dibatalkan dari puncak heap.
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait_for = self._heap[0][0] - time.monotonic()
+                    if wait_for <= 0:
+                        break
+                    self._cond.wait(wait_for)
+                _, _, action = heapq.heappop(self._heap)
+                if action.key is not None and self._pending.get(action.key) is action:
+                    del self._pending[action.key]
+            try:
+                action.func(*action.args, **action.kwargs)
+            except Exception as e:
+                logger.error(f"Aksi tertunda gagal ({action.key or getattr(action.func, '__name__', action.func)}): {e}", exc_info=True)
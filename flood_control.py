@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class FloodControl:
+    """
+    Deteksi flood berbasis token bucket per (chat, user).
+    Setiap pengirim hanya menyimpan [token, waktu_terakhir] di dict berurutan LRU,
+    dengan batas jumlah entri dan penggusuran pengirim yang sudah menganggur.
+    """
+    def __init__(self, rate=1.0, burst=5, max_entries=50000, idle_seconds=600):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_entries = max(1, int(max_entries))
+        self.idle_seconds = idle_seconds
+        self._buckets = OrderedDict()  # (chat_id, user_id) -> [tokens, updated]
+        self._lock = threading.Lock()
+        self.stats = {'checked': 0, 'shed': 0, 'evictions': 0}
+
+    def allow(self, chat_id, user_id, now=None):
+        """True jika pesan boleh diproses; False jika pengirim sedang flood."""
+        now = now or time.monotonic()
+        key = (chat_id, user_id)
+        with self._lock:
+            self.stats['checked'] += 1
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                self._evict(now)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                self.stats['shed'] += 1
+                return False
+            bucket[0] -= 1
+            return True
+
+    def _evict(self, now):
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_entries and now - updated < self.idle_seconds:
+                break
+            del self._buckets[key]
+            self.stats['evictions'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, tracked=len(self._buckets))
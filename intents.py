@@ -0,0 +1,60 @@
+import re
+
+
+class Intent:
+    """Satu baris tabel intent: nama, kata kunci (atau regex), prioritas, handler, dan kelas kerja untuk admission control."""
+    __slots__ = ('name', 'priority', 'handler', 'keywords', 'pattern', 'work_class')
+
+    def __init__(self, name, priority, handler=None, keywords=(), pattern=None, work_class='reply'):
+        self.name = name
+        self.priority = priority
+        self.handler = handler
+        self.keywords = tuple(keywords)
+        self.pattern = pattern
+        self.work_class = work_class
+
+    def __repr__(self):
+        return f"Intent({self.name!r}, priority={self.priority})"
+
+
+class IntentRouter:
+    """
+    Router intent yang dikompilasi sekali dari tabel deklaratif.
+    Semua intent digabung menjadi satu regex bergrup (dengan batas kata), sehingga
+    klasifikasi hanya butuh satu kali pemindaian teks. Angka prioritas lebih kecil menang.
+    """
+    def __init__(self, intents):
+        self.intents = sorted(intents, key=lambda intent: intent.priority)
+        self._by_group = {}
+        alternatives = []
+        for index, intent in enumerate(self.intents):
+            if intent.pattern:
+                body = intent.pattern
+            else:
+                words = sorted({kw.lower() for kw in intent.keywords}, key=len, reverse=True)
+                if not words:
+                    continue
+                body = r'\b(?:' + '|'.join(re.escape(w) for w in words) + r')\b'
+            group = f"i{index}"
+            self._by_group[group] = intent
+            alternatives.append(f"(?P<{group}>{body})")
+        self._regex = re.compile('|'.join(alternatives)) if alternatives else None
+        self._top_priority = self.intents[0].priority if self.intents else None
+
+    def classify(self, lower_text):
+        """
+        Mengembalikan (intent_terbaik, nama_intent_yang_cocok).
+        'lower_text' harus sudah di-lowercase dan di-strip oleh pemanggil.
+        """
+        if not self._regex or not lower_text:
+            return None, frozenset()
+        best = None
+        matched = set()
+        for match in self._regex.finditer(lower_text):
+            intent = self._by_group[match.lastgroup]
+            matched.add(intent.name)
+            if best is None or intent.priority < best.priority:
+                best = intent
+                if intent.priority == self._top_priority:
+                    break
+        return best, frozenset(matched)
@@ -0,0 +1,55 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class JoinAggregator:
+    """
+    Mengumpulkan event 'new_chat_members' per chat selama satu jendela waktu,
+    lalu menyerahkannya sekaligus: on_flush(chat_id, members) untuk sapaan gabungan,
+    atau on_raid(chat_id, count) jika jumlahnya melewati ambang raid.
+    """
+    def __init__(self, delayed, on_flush, on_raid, window_seconds=15, raid_threshold=20, max_buffered=200):
+        self.delayed = delayed
+        self.on_flush = on_flush
+        self.on_raid = on_raid
+        self.window_seconds = window_seconds
+        self.raid_threshold = raid_threshold
+        # Anggota yang disimpan per jendela dibatasi; sisanya hanya dihitung.
+        self.max_buffered = max_buffered
+        self._buffers = {}  # chat_id -> [members, total_count]
+        self._lock = threading.Lock()
+        self.stats = {'joins': 0, 'batches': 0, 'raids': 0}
+
+    def add(self, chat_id, members):
+        if not members:
+            return
+        with self._lock:
+            self.stats['joins'] += len(members)
+            buffer = self._buffers.get(chat_id)
+            if buffer is None:
+                buffer = self._buffers[chat_id] = [[], 0]
+                self.delayed.schedule(self.window_seconds, self._flush, chat_id, key=('join', chat_id))
+            room = self.max_buffered - len(buffer[0])
+            if room > 0:
+                buffer[0].extend(members[:room])
+            buffer[1] += len(members)
+
+    def _flush(self, chat_id):
+        with self._lock:
+            buffer = self._buffers.pop(chat_id, None)
+        if not buffer:
+            return
+        members, total = buffer
+        if total >= self.raid_threshold:
+            self.stats['raids'] += 1
+            logger.warning(f"Raid join terdeteksi di chat {chat_id}: {total} anggota dalam {self.window_seconds} detik.")
+            self.on_raid(chat_id, total)
+        else:
+            self.stats['batches'] += 1
+            self.on_flush(chat_id, members)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, buffering_chats=len(self._buffers))
@@ -1,11 +1,25 @@
+import time
+# Dicatat sebelum impor lain agar rincian waktu startup ikut menghitung biaya impor.
+_process_started = time.perf_counter()
 import os
 import logging
-import time
-from flask import Flask, request, abort
+import json
+import signal
+import sys
+import threading
+from flask import Flask, Response, request, abort, jsonify
 import telebot
 from waitress import serve
 from config import Config
 from bot_logic import BotLogic
+from update_queue import UpdateDispatcher
+from webhook_setup import configure_webhook
+from poller import OffsetStore, UpdatePoller
+from metrics import metrics
+from startup_timing import StartupTimer
+
+startup = StartupTimer(_process_started)
+startup.mark("impor")
 
 # === BLOK DIAGNOSTIK BARU ===
 # Kode ini akan berjalan pertama kali untuk memeriksa semua variabel lingkungan.
@@ -57,10 +71,40 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 bot = None
 bot_logic = None
+update_dispatcher = None
+update_poller = None
+
+def process_update(update_json):
+    update = telebot.types.Update.de_json(update_json)
+    bot.process_new_updates([update])
+    startup.first_update_done()
+
+def process_batch(updates):
+    bot.process_new_updates(updates)
+    startup.first_update_done()
+
+def configure_webhook_and_log():
+    configure_webhook(bot, skip_if_current=Config.FAST_START())
+    startup.mark("webhook")
+    startup.log()
+
+def start_polling():
+    global update_poller
+    offsets = OffsetStore(bot_logic.db, Config.BOT_TOKEN().split(':', 1)[0])
+    update_poller = UpdatePoller(bot, process_batch, offsets, batch_size=Config.POLLING_BATCH_SIZE(), poll_timeout=Config.POLLING_TIMEOUT())
+    update_poller.start()
 
 try:
     bot = telebot.TeleBot(Config.BOT_TOKEN(), threaded=False)
     bot_logic = BotLogic(bot)
+    startup.mark("bot_logic")
+    if Config.SCHEDULER_ENABLED():
+        bot_logic.start_scheduler()
+    if Config.WEBHOOK_FAST_ACK():
+        update_dispatcher = UpdateDispatcher(process_update, workers=Config.UPDATE_WORKERS(), queue_size=Config.UPDATE_QUEUE_SIZE())
+        update_dispatcher.start()
+        bot_logic.admission.add_probe('update_queue', update_dispatcher.depth, Config.UPDATE_QUEUE_SIZE() // 4, Config.UPDATE_QUEUE_SIZE() // 2)
+    startup.mark("pekerja_latar")
 except Exception as e:
     logger.critical(f"Terjadi error saat inisialisasi bot: {e}", exc_info=True)
     raise e
@@ -71,24 +115,68 @@ except Exception as e:
 @app.route('/<token>', methods=['POST'])
 def webhook(token):
     if token == Config.BOT_TOKEN() and bot_logic and request.headers.get('content-type') == 'application/json':
+        json_string = request.get_data().decode('utf-8')
+        if update_dispatcher:
+            try:
+                update_json = json.loads(json_string)
+            except ValueError:
+                update_json = None
+            if not isinstance(update_json, dict):
+                logger.warning("Webhook menerima JSON yang tidak valid, diabaikan.")
+                return "OK", 200
+            if update_dispatcher.submit(update_json) == UpdateDispatcher.BUSY:
+                # Antrian penuh: minta Telegram mengirim ulang nanti daripada menumpuk di memori.
+                logger.warning("Antrian update penuh, menolak update sementara.")
+                return "Busy", 503
+            return "OK", 200
         try:
-            bot_logic.check_and_run_schedules()
-            json_string = request.get_data().decode('utf-8')
-            update = telebot.types.Update.de_json(json_string)
-            bot.process_new_updates([update])
+            process_update(json_string)
         except Exception as e:
             logger.error(f"Terjadi pengecualian yang tidak ditangani di webhook: {e}", exc_info=True)
         return "OK", 200
     else:
         abort(403)
 
+@app.route('/<token>/profile', methods=['GET', 'POST'])
+def profile(token):
+    # Dilindungi token bot seperti webhook. POST memulai profiling, GET menampilkan status.
+    if token != Config.BOT_TOKEN() or not bot_logic:
+        abort(403)
+    if request.method == 'POST':
+        if request.args.get('stop'):
+            bot_logic.profiler.stop()
+        else:
+            seconds = request.args.get('seconds', type=int)
+            updates = request.args.get('updates', type=int)
+            message = bot_logic.start_profiling(seconds, updates, all_threads=bool(request.args.get('all')))
+            return jsonify({'message': message, **bot_logic.profiler.snapshot()}), 200
+    return jsonify({**bot_logic.profiler.snapshot(), 'last_report': bot_logic.profiler.last_report}), 200
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    if bot_logic:
-        bot_logic.check_and_run_schedules()
     # Mengembalikan respons kosong dengan status 204 (No Content)
     return ('', 204)
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    if not bot_logic:
+        return ('', 503)
+    payload = component_stats()
+    return jsonify(payload), 200
+
+def component_stats():
+    payload = bot_logic.snapshot() if bot_logic else {}
+    if update_dispatcher:
+        payload["update_queue"] = update_dispatcher.snapshot()
+    if update_poller:
+        payload["poller"] = update_poller.snapshot()
+    payload["startup"] = startup.snapshot()
+    return payload
+
+@app.route('/metrics', methods=['GET'])
+def metrics_view():
+    return Response(metrics.render(component_stats()), mimetype='text/plain; version=0.0.4')
+
 @app.route('/', methods=['GET'])
 def index():
     return "🐸 Bot Telegram NPEPE hidup — webhook diaktifkan.", 200
@@ -99,20 +187,20 @@ def index():
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 10000))
     if bot and bot_logic:
-        webhook_url = f"{Config.WEBHOOK_BASE_URL()}/{Config.BOT_TOKEN()}"
-        logger.info("Memulai bot dan mengatur webhook...")
-        try:
-            bot.remove_webhook()
-            time.sleep(0.5)
-            success = bot.set_webhook(url=webhook_url)
-            if success:
-                logger.info("✅ Webhook berhasil diatur.")
-            else:
-                logger.error("❌ Gagal mengatur webhook.")
-        except Exception as e:
-            logger.error(f"Error saat mengkonfigurasi webhook: {e}", exc_info=True)
-        
-        serve(app, host="0.0.0.0", port=port)
+        # SIGTERM diubah menjadi SystemExit agar handler atexit (flush log moderasi) tetap berjalan.
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        if Config.INGESTION_MODE() == "polling":
+            # Server HTTP tetap jalan untuk /health dan /stats.
+            start_polling()
+            startup.mark("polling")
+            startup.log()
+        elif Config.FAST_START():
+            # Server langsung mendengarkan; webhook yang sudah benar tetap mengirim update selama pemeriksaan berjalan.
+            threading.Thread(target=configure_webhook_and_log, name="webhook-setup", daemon=True).start()
+        else:
+            configure_webhook_and_log()
+
+        serve(app, host="0.0.0.0", port=port, threads=Config.WAITRESS_THREADS())
     else:
         logger.error("Bot tidak diinisialisasi. Berjalan dalam mode server terdegradasi.")
         serve(app, host="0.0.0.0", port=port)
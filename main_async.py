@@ -0,0 +1,177 @@
+import os
+import asyncio
+import logging
+import signal
+from collections import OrderedDict
+
+import httpx
+import telebot
+from aiohttp import web
+from config import Config
+from async_engine import AsyncBotLogic, AsyncTelegramApi
+from webhook_setup import configure_webhook
+from poller import OffsetStore, UpdatePoller
+from metrics import metrics
+
+# ==========================
+#  ⚡  TITIK MASUK MODE ASYNC
+# ==========================
+# Alternatif untuk main.py: webhook diterima oleh server aiohttp dan semua I/O keluar
+# (Telegram, Groq) berjalan di satu event loop dengan pool koneksi keep-alive bersama.
+# Jalankan dengan: python main_async.py
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+REQUIRED_VARS = ["BOT_TOKEN", "WEBHOOK_BASE_URL", "DATABASE_URL", "GROQ_API_KEY", "GROUP_CHAT_ID", "GROUP_OWNER_ID"]
+DEDUPE_SIZE = 10000
+
+
+class AsyncWebhookServer:
+    def __init__(self, bot, bot_logic):
+        self.bot = bot
+        self.bot_logic = bot_logic
+        self.poller = None
+        self.max_inflight = Config.ASYNC_MAX_INFLIGHT()
+        self._seen = OrderedDict()
+        self.stats = {'processed': 0, 'duplicates': 0, 'rejected': 0, 'errors': 0}
+
+    def routes(self):
+        return [
+            web.post('/{token}', self.webhook),
+            web.get('/{token}/profile', self.profile_view),
+            web.post('/{token}/profile', self.profile_view),
+            web.get('/health', self.health_check),
+            web.get('/stats', self.stats_view),
+            web.get('/metrics', self.metrics_view),
+            web.get('/', self.index),
+        ]
+
+    def _is_duplicate(self, update_id):
+        if update_id is None:
+            return False
+        if update_id in self._seen:
+            return True
+        self._seen[update_id] = None
+        if len(self._seen) > DEDUPE_SIZE:
+            self._seen.popitem(last=False)
+        return False
+
+    def _process_update(self, update_json):
+        update = telebot.types.Update.de_json(update_json)
+        self.bot.process_new_updates([update])
+
+    async def webhook(self, request):
+        if request.match_info['token'] != Config.BOT_TOKEN() or request.content_type != 'application/json':
+            raise web.HTTPForbidden()
+        try:
+            update_json = await request.json()
+        except ValueError:
+            update_json = None
+        if not isinstance(update_json, dict):
+            logger.warning("Webhook menerima JSON yang tidak valid, diabaikan.")
+            return web.Response(text="OK")
+        if self._is_duplicate(update_json.get('update_id')):
+            self.stats['duplicates'] += 1
+            return web.Response(text="OK")
+        if self.bot_logic.pending_work() > self.max_inflight:
+            # Terlalu banyak pekerjaan tertunda: minta Telegram mengirim ulang nanti.
+            self.stats['rejected'] += 1
+            self._seen.pop(update_json.get('update_id'), None)
+            logger.warning("Terlalu banyak pekerjaan tertunda, menolak update sementara.")
+            return web.Response(text="Busy", status=503)
+        try:
+            if self.bot_logic.scale_out:
+                # Klaim cooldown bersama menyentuh Postgres; jangan blokir event loop.
+                await asyncio.get_running_loop().run_in_executor(None, self._process_update, update_json)
+            else:
+                # Handler hanya bekerja di memori: I/O diantrikan ke AsyncOutbound atau task AI.
+                self._process_update(update_json)
+            self.stats['processed'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Terjadi pengecualian yang tidak ditangani di webhook: {e}", exc_info=True)
+        return web.Response(text="OK")
+
+    async def profile_view(self, request):
+        # Dilindungi token bot seperti webhook. POST memulai profiling, GET menampilkan status.
+        if request.match_info['token'] != Config.BOT_TOKEN():
+            raise web.HTTPForbidden()
+        profiler = self.bot_logic.profiler
+        if request.method == 'POST':
+            if request.query.get('stop'):
+                profiler.stop()
+            else:
+                seconds = int(request.query['seconds']) if request.query.get('seconds', '').isdigit() else None
+                updates = int(request.query['updates']) if request.query.get('updates', '').isdigit() else None
+                message = self.bot_logic.start_profiling(seconds, updates, all_threads=bool(request.query.get('all')))
+                return web.json_response({'message': message, **profiler.snapshot()})
+        return web.json_response({**profiler.snapshot(), 'last_report': profiler.last_report})
+
+    async def health_check(self, request):
+        return web.Response(status=204)
+
+    def component_stats(self):
+        payload = self.bot_logic.snapshot()
+        payload["webhook"] = dict(self.stats)
+        if self.poller:
+            payload["poller"] = self.poller.snapshot()
+        return payload
+
+    async def stats_view(self, request):
+        return web.json_response(self.component_stats())
+
+    async def metrics_view(self, request):
+        return web.Response(text=metrics.render(self.component_stats()), content_type='text/plain')
+
+    async def index(self, request):
+        return web.Response(text="🐸 Bot Telegram NPEPE hidup — webhook diaktifkan (mode async).")
+
+
+async def run(port):
+    loop = asyncio.get_running_loop()
+    limits = httpx.Limits(max_connections=Config.HTTP_MAX_CONNECTIONS(), max_keepalive_connections=Config.HTTP_MAX_CONNECTIONS() // 2)
+    http = httpx.AsyncClient(timeout=15.0, limits=limits)
+    bot = telebot.TeleBot(Config.BOT_TOKEN(), threaded=False)
+    try:
+        bot_logic = AsyncBotLogic(bot, AsyncTelegramApi(Config.BOT_TOKEN(), http), http, loop)
+        bot_logic.outbound.start()
+        if Config.SCHEDULER_ENABLED():
+            bot_logic.start_scheduler()
+    except Exception as e:
+        logger.critical(f"Terjadi error saat inisialisasi bot: {e}", exc_info=True)
+        await http.aclose()
+        raise
+
+    server = AsyncWebhookServer(bot, bot_logic)
+    app = web.Application()
+    app.add_routes(server.routes())
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host="0.0.0.0", port=port).start()
+    logger.info(f"Server async mendengarkan di port {port}.")
+    if Config.INGESTION_MODE() == "polling":
+        # Batch diproses di thread poller; handler tetap aman karena I/O diteruskan ke event loop.
+        offsets = OffsetStore(bot_logic.db, Config.BOT_TOKEN().split(':', 1)[0])
+        server.poller = UpdatePoller(bot, bot.process_new_updates, offsets, batch_size=Config.POLLING_BATCH_SIZE(), poll_timeout=Config.POLLING_TIMEOUT())
+        await loop.run_in_executor(None, server.poller.start)
+    else:
+        await loop.run_in_executor(None, lambda: configure_webhook(bot, skip_if_current=Config.FAST_START()))
+    stopped = asyncio.Event()
+    # SIGTERM dari Render: berhenti dengan rapi agar buffer log moderasi sempat ditulis.
+    loop.add_signal_handler(signal.SIGTERM, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        await runner.cleanup()
+        await loop.run_in_executor(None, bot_logic.moderation_log.close)
+        await http.aclose()
+
+
+if __name__ == "__main__":
+    missing_vars = [var for var in REQUIRED_VARS if not os.environ.get(var)]
+    if missing_vars:
+        raise ValueError(f"Variabel lingkungan penting hilang: {', '.join(missing_vars)}")
+    asyncio.run(run(int(os.environ.get("PORT", 10000))))
@@ -0,0 +1,173 @@
+import functools
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+# Batas bucket histogram latensi (detik), dari query DB cepat sampai panggilan Groq lambat.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shard:
+    """Akumulator milik satu thread. Hanya thread pemiliknya yang menulis, jadi tanpa lock."""
+    __slots__ = ('histograms', 'counters')
+
+    def __init__(self):
+        self.histograms = {}  # (nama, label) -> [counts_per_bucket, sum]
+        self.counters = {}  # (nama, label) -> nilai
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'labels', 'started')
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        outcome = 'ok' if exc_type is None else 'error'
+        self.metrics.observe(self.name, self.labels + (('outcome', outcome),), time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Registri metrik bergaya Prometheus dengan akumulasi per thread.
+    observe() dan inc() hanya menyentuh dict milik thread pemanggil (tanpa lock, tanpa log);
+    shard baru digabung saat /metrics di-scrape. Label berupa tuple pasangan (kunci, nilai).
+    Shard milik thread yang sudah berhenti dilebur ke satu shard 'retired' agar daftar shard
+    tidak tumbuh terus oleh thread sementara (executor, thread per perintah, respawn waitress).
+    """
+    def __init__(self, prefix="npepe_", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            # Dipanggil saat objek Thread dibebaskan, yaitu setelah thread selesai; tidak ada lagi penulis.
+            weakref.finalize(threading.current_thread(), self._retire, shard)
+        return shard
+
+    @staticmethod
+    def _add_into(target, shard):
+        for key, (counts, total) in list(shard.histograms.items()):
+            merged = target.histograms.setdefault(key, [[0] * len(counts), 0.0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+        for key, value in list(shard.counters.items()):
+            target.counters[key] = target.counters.get(key, 0) + value
+
+    def _retire(self, shard):
+        with self._shards_lock:
+            try:
+                self._shards.remove(shard)
+            except ValueError:
+                return
+            self._add_into(self._retired, shard)
+
+    def observe(self, name, labels, seconds):
+        histograms = self._shard().histograms
+        entry = histograms.get((name, labels))
+        if entry is None:
+            entry = histograms[(name, labels)] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, seconds)] += 1
+        entry[1] += seconds
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard().counters
+        counters[(name, labels)] = counters.get((name, labels), 0) + value
+
+    def timer(self, name, **labels):
+        """Context manager (juga dipakai di coroutine): `with metrics.timer('groq_request_seconds', call='answer'):`."""
+        return _Timer(self, name, tuple(sorted(labels.items())))
+
+    def timed(self, name, **labels):
+        """Dekorator: mencatat durasi func ke histogram 'name' dengan label outcome=ok|error."""
+        base = tuple(sorted(labels.items()))
+        ok_labels = base + (('outcome', 'ok'),)
+        error_labels = base + (('outcome', 'error'),)
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException:
+                    self.observe(name, error_labels, time.perf_counter() - started)
+                    raise
+                self.observe(name, ok_labels, time.perf_counter() - started)
+                return result
+            return wrapper
+        return decorator
+
+    # --- Ekspor ---
+
+    def _merge(self):
+        total = _Shard()
+        with self._shards_lock:
+            shards = list(self._shards)
+            self._add_into(total, self._retired)
+        for shard in shards:
+            # list() atas dict berjalan atomik di bawah GIL, aman walau pemilik shard sedang menulis.
+            self._add_into(total, shard)
+        return total.histograms, total.counters
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ""
+        parts = []
+        for key, value in labels:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{key}="{value}"')
+        return "{" + ",".join(parts) + "}"
+
+    def render(self, components=None):
+        """Teks exposition Prometheus. 'components' adalah dict snapshot {komponen: {stat: angka}} sebagai gauge."""
+        histograms, counters = self._merge()
+        lines = []
+        for name in sorted({key[0] for key in histograms}):
+            metric = self.prefix + name
+            lines.append(f"# TYPE {metric} histogram")
+            for (hist_name, labels), (counts, total) in sorted(histograms.items()):
+                if hist_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{self._format_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{metric}_sum{self._format_labels(labels)} {total}")
+                lines.append(f"{metric}_count{self._format_labels(labels)} {cumulative}")
+        for name in sorted({key[0] for key in counters}):
+            metric = self.prefix + name
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{self._format_labels(labels)} {value}")
+        if components:
+            metric = self.prefix + "component"
+            lines.append(f"# TYPE {metric} gauge")
+            for component, stats in sorted(components.items()):
+                if not isinstance(stats, dict):
+                    stats = {'value': stats}
+                for stat, value in sorted(stats.items()):
+                    if isinstance(value, (int, float)):
+                        lines.append(f"{metric}{self._format_labels((('component', component), ('stat', stat)))} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
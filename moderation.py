@@ -0,0 +1,88 @@
+import re
+from urllib.parse import urlsplit
+
+
+class SpamFilter:
+    """
+    Mesin moderasi yang dikompilasi sekali saat startup.
+    Kata terlarang, tautan, dan alamat kontrak masing-masing satu regex yang memindai teks sekali;
+    tautan hanya dipindai bila teks memuat "http"/"t.me" (atau mode raid). Semua pola berjalan
+    linear terhadap panjang token. Allowlist domain dicocokkan per hostname (bukan substring),
+    jadi 'pump.fun.evil.com' tetap ditolak.
+    """
+    URL_PATTERN = r'https?://[^\s]+'
+    # Lookbehind: hanya mulai di awal token, sehingga token panjang tidak dicoba ulang di setiap posisi.
+    BARE_DOMAIN_PATTERN = r'(?<![\w.-])[\w-]+(?:\.[\w-]+)+(?:/[^\s]*)?'
+    SOLANA_PATTERN = r'\b[1-9A-HJ-NP-Za-km-z]{32,44}\b'
+    EVM_PATTERN = r'\b0x[a-fA-F0-9]{40}\b'
+
+    def __init__(self, forbidden_keywords, allowed_domains, contract_address=None):
+        self.contract_address = contract_address
+        keywords = sorted({kw.lower() for kw in forbidden_keywords if kw}, key=len, reverse=True)
+        self._keyword_re = re.compile('|'.join(re.escape(kw) for kw in keywords)) if keywords else None
+        self._link_re = re.compile(f"(?P<url>{self.URL_PATTERN})|(?P<bare>{self.BARE_DOMAIN_PATTERN})")
+        self._address_re = re.compile(f"(?P<evm>{self.EVM_PATTERN})|(?P<sol>{self.SOLANA_PATTERN})")
+        # hostname -> set prefiks path yang diizinkan (None berarti seluruh domain).
+        self._allowed_hosts = {}
+        for entry in allowed_domains:
+            host, _, path = entry.lower().partition('/')
+            self._allowed_hosts.setdefault(host, set()).add(path.strip('/') or None)
+
+    def _is_allowed_link(self, link):
+        target = link if '://' in link else f"http://{link}"
+        try:
+            parts = urlsplit(target)
+            host = (parts.hostname or '').rstrip('.')
+        except ValueError:
+            return False
+        if not host:
+            return False
+        first_segment = parts.path.strip('/').split('/', 1)[0].lower()
+        labels = host.split('.')
+        # Cocokkan host persis atau sebagai subdomain dari entri allowlist.
+        for i in range(len(labels) - 1):
+            paths = self._allowed_hosts.get('.'.join(labels[i:]))
+            if paths and (None in paths or first_segment in paths):
+                return True
+        return False
+
+    @staticmethod
+    def _looks_like_domain(candidate):
+        host = candidate.split('/', 1)[0].rstrip('.')
+        tld = host.rsplit('.', 1)[-1]
+        return len(tld) >= 2 and tld.isalpha()
+
+    def check(self, text, strict=False):
+        """
+        Mengembalikan (is_spam, reason) dengan kontrak yang sama seperti _is_spam_or_ad.
+        strict=True (mode raid) menolak semua tautan, termasuk yang ada di allowlist.
+        """
+        if not text:
+            return False, None
+        text_lower = text.lower()
+        if self._keyword_re:
+            # Dicari sebagai substring seperti sebelumnya, jadi 'myairdrop.com' dan 'my.private sale' tetap kena.
+            keyword = self._keyword_re.search(text_lower)
+            if keyword:
+                return True, f"Forbidden Keyword: {keyword.group()}"
+
+        if strict or "http" in text_lower or "t.me" in text_lower:
+            for match in self._link_re.finditer(text):
+                value = match.group()
+                if match.lastgroup == 'bare' and not self._looks_like_domain(value):
+                    continue
+                if strict or not self._is_allowed_link(value):
+                    return True, f"Raid Mode Link: {value}" if strict else f"Unauthorized Link: {value}"
+
+        solana_hit = False
+        evm_hit = False
+        for match in self._address_re.finditer(text):
+            if match.lastgroup == 'evm':
+                evm_hit = True
+            else:
+                solana_hit = True
+        if solana_hit and not (self.contract_address and self.contract_address in text):
+            return True, "Potential Solana Contract Address"
+        if evm_hit:
+            return True, "Potential EVM Contract Address"
+        return False, None
@@ -0,0 +1,130 @@
+import atexit
+import logging
+import re
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ModerationLog:
+    """
+    Log audit keputusan moderasi ke tabel 'moderation_events'.
+    record() hanya menambah tuple ke buffer di memori (dibatasi max_buffer; event tertua dibuang
+    jika penuh). Thread latar menulis buffer sekaligus dengan satu INSERT multi-VALUES saat
+    batch_size tercapai, tiap flush_seconds, dan sekali lagi saat proses berhenti.
+    """
+    _REASON_KIND = re.compile(r'[:(]')
+
+    def __init__(self, db, batch_size=200, flush_seconds=10, max_buffer=10000):
+        self.db = db
+        self.batch_size = max(1, int(batch_size))
+        self.flush_seconds = flush_seconds
+        self._buffer = deque(maxlen=max(self.batch_size, int(max_buffer)))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'flushes': 0, 'flush_errors': 0}
+
+    @property
+    def enabled(self):
+        return self.db.available
+
+    def ensure_table(self):
+        if not self.db.available:
+            return
+        try:
+            self.db.execute("CREATE TABLE IF NOT EXISTS moderation_events (id BIGSERIAL PRIMARY KEY, created_at TIMESTAMPTZ NOT NULL, "
+                            "chat_id BIGINT NOT NULL, user_id BIGINT, message_id BIGINT, action TEXT NOT NULL, reason_kind TEXT NOT NULL, reason TEXT)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS moderation_events_chat_time ON moderation_events (chat_id, created_at)")
+            logger.info("Tabel database 'moderation_events' siap.")
+        except Exception as e:
+            logger.error(f"Gagal membuat tabel log moderasi: {e}")
+
+    def start(self):
+        if self._thread or not self.enabled:
+            return
+        self._thread = threading.Thread(target=self._run, name="moderation-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def reason_kind(cls, reason):
+        """'Forbidden Keyword: airdrop' -> 'Forbidden Keyword'; dipakai untuk agregasi per alasan."""
+        return cls._REASON_KIND.split(reason or 'unknown', 1)[0].strip() or 'unknown'
+
+    def record(self, chat_id, user_id, message_id, action, reason):
+        if not self.enabled:
+            return
+        event = (datetime.now(timezone.utc), chat_id, user_id, message_id, action, self.reason_kind(reason), reason)
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.stats['dropped'] += 1
+            self._buffer.append(event)
+            self.stats['recorded'] += 1
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Menulis semua event yang ter-buffer. Aman dipanggil dari thread mana pun."""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+            if not rows:
+                return 0
+            try:
+                self.db.execute_values(
+                    "INSERT INTO moderation_events (created_at, chat_id, user_id, message_id, action, reason_kind, reason) VALUES %s", rows)
+            except Exception as e:
+                with self._lock:
+                    self.stats['flush_errors'] += 1
+                    # Kembalikan ke depan buffer; yang tidak muat dihitung sebagai dibuang.
+                    room = self._buffer.maxlen - len(self._buffer)
+                    self.stats['dropped'] += max(0, len(rows) - room)
+                    self._buffer.extendleft(reversed(rows[-room:] if room else []))
+                logger.error(f"Gagal menulis {len(rows)} event moderasi: {e}")
+                return 0
+            with self._lock:
+                self.stats['written'] += len(rows)
+                self.stats['flushes'] += 1
+            return len(rows)
+
+    def close(self):
+        written = self.flush()
+        if written:
+            logger.info(f"Log moderasi: {written} event ditulis saat shutdown.")
+
+    def summary(self, window_seconds, chat_id=None, limit=10):
+        """
+        Statistik dalam window_seconds terakhir: total, per alasan (reason_kind) dan pengguna teratas.
+        Buffer di-flush dulu agar event terbaru ikut terhitung.
+        """
+        self.flush()
+        conditions = "created_at > now() - %s * interval '1 second'"
+        params = [float(window_seconds)]
+        if chat_id is not None:
+            conditions += " AND chat_id = %s"
+            params.append(int(chat_id))
+        with self.db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT action, count(*) FROM moderation_events WHERE {conditions} GROUP BY action ORDER BY 2 DESC", params)
+                by_action = cursor.fetchall()
+                cursor.execute(f"SELECT reason_kind, count(*) FROM moderation_events WHERE {conditions} GROUP BY reason_kind ORDER BY 2 DESC LIMIT %s", params + [limit])
+                by_reason = cursor.fetchall()
+                cursor.execute(f"SELECT user_id, count(*) FROM moderation_events WHERE {conditions} AND user_id IS NOT NULL GROUP BY user_id ORDER BY 2 DESC LIMIT %s", params + [limit])
+                by_user = cursor.fetchall()
+        return {'total': sum(count for _, count in by_action), 'by_action': by_action, 'by_reason': by_reason, 'by_user': by_user}
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, buffered=len(self._buffer))
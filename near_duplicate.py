@@ -0,0 +1,135 @@
+import hashlib
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class _Entry:
+    __slots__ = ('timestamp', 'user_id', 'fingerprint', 'keys')
+
+    def __init__(self, timestamp, user_id, fingerprint, keys):
+        self.timestamp = timestamp
+        self.user_id = user_id
+        self.fingerprint = fingerprint
+        self.keys = keys
+
+
+class _ChatIndex:
+    __slots__ = ('buckets', 'entries')
+
+    def __init__(self):
+        self.buckets = {}  # (band, nilai) -> list _Entry
+        self.entries = deque()  # urutan waktu, untuk penggusuran jendela
+
+
+class NearDuplicateDetector:
+    """
+    Deteksi kampanye shill dengan tanda tangan MinHash atas shingle kata.
+    Tanda tangan dibagi menjadi band (LSH); pesan yang mirip hampir pasti berbagi
+    minimal satu band identik, jadi pencarian cukup melihat bucket band (bukan
+    membandingkan semua pasangan). Indeks per chat dibatasi jendela waktu dan jumlah entri.
+    """
+    _TOKEN = re.compile(r'\w+')
+    _DIGITS = re.compile(r'\d+')
+    # Satu digest blake2b 64 byte = 16 nilai hash 32-bit, jadi satu hash per shingle sudah cukup.
+    NUM_HASHES = 16
+
+    def __init__(self, window_seconds=600, min_users=3, min_tokens=6, similarity=0.5,
+                 rows_per_band=2, shingle_size=3, max_entries_per_chat=2000, max_chats=1000):
+        if self.NUM_HASHES % rows_per_band:
+            raise ValueError("rows_per_band harus membagi habis NUM_HASHES")
+        self.window_seconds = window_seconds
+        self.min_users = min_users
+        self.min_tokens = min_tokens
+        self.min_matches = max(1, int(round(similarity * self.NUM_HASHES)))
+        self.rows_per_band = rows_per_band
+        self.shingle_size = shingle_size
+        self.max_entries_per_chat = max_entries_per_chat
+        self.max_chats = max_chats
+        self._chats = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'checked': 0, 'skipped_short': 0, 'flagged': 0}
+
+    def fingerprint(self, text):
+        """Tanda tangan MinHash (tuple 16 int), atau None jika teks terlalu pendek untuk dibandingkan."""
+        tokens = self._TOKEN.findall(self._DIGITS.sub('0', text.lower()))
+        if len(tokens) < self.min_tokens:
+            return None
+        size = min(self.shingle_size, len(tokens))
+        signature = None
+        for shingle in {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}:
+            values = struct.unpack('>16I', hashlib.blake2b(shingle.encode('utf-8'), digest_size=64).digest())
+            signature = values if signature is None else tuple(map(min, signature, values))
+        return signature
+
+    def _band_keys(self, signature):
+        r = self.rows_per_band
+        return tuple((band, signature[band * r:(band + 1) * r]) for band in range(self.NUM_HASHES // r))
+
+    def _similar(self, a, b):
+        return sum(1 for x, y in zip(a, b) if x == y) >= self.min_matches
+
+    def _expire(self, index, now):
+        cutoff = now - self.window_seconds
+        while index.entries and (index.entries[0].timestamp < cutoff or len(index.entries) > self.max_entries_per_chat):
+            old = index.entries.popleft()
+            for key in old.keys:
+                bucket = index.buckets.get(key)
+                if bucket:
+                    try: bucket.remove(old)
+                    except ValueError: pass
+                    if not bucket:
+                        del index.buckets[key]
+
+    def check(self, chat_id, user_id, text, now=None):
+        """
+        Mencatat pesan lalu mengembalikan (is_duplicate, reason).
+        Pesan ditandai jika salinan yang mirip sudah dikirim oleh cukup banyak user berbeda dalam jendela waktu.
+        """
+        fingerprint = self.fingerprint(text or "")
+        if fingerprint is None:
+            with self._lock:
+                self.stats['skipped_short'] += 1
+            return False, None
+        now = now or time.time()
+        keys = self._band_keys(fingerprint)
+        with self._lock:
+            self.stats['checked'] += 1
+            index = self._chats.get(chat_id)
+            if index is None:
+                index = self._chats[chat_id] = _ChatIndex()
+                while len(self._chats) > self.max_chats:
+                    self._chats.popitem(last=False)
+            else:
+                self._chats.move_to_end(chat_id)
+            self._expire(index, now)
+
+            users = {user_id}
+            seen = set()
+            for key in keys:
+                for entry in index.buckets.get(key, ()):
+                    if entry.user_id in users or id(entry) in seen:
+                        continue
+                    seen.add(id(entry))
+                    if self._similar(entry.fingerprint, fingerprint):
+                        users.add(entry.user_id)
+                        if len(users) >= self.min_users:
+                            break
+                if len(users) >= self.min_users:
+                    break
+
+            entry = _Entry(now, user_id, fingerprint, keys)
+            index.entries.append(entry)
+            for key in keys:
+                index.buckets.setdefault(key, []).append(entry)
+
+            if len(users) >= self.min_users:
+                self.stats['flagged'] += 1
+                return True, f"Near-Duplicate Campaign ({len(users)} users)"
+            return False, None
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, chats=len(self._chats))
@@ -0,0 +1,408 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Priority:
+    """Kelas prioritas pengiriman. Angka lebih kecil dikirim lebih dulu."""
+    MODERATION = 0   # hapus spam
+    CALLBACK = 1     # answer_callback_query
+    REPLY = 2        # jawaban perintah, CA/buy, AI
+    CHATTER = 3      # hype acak dan postingan terjadwal
+    GREETING = 4     # sapaan anggota baru
+
+
+class DroppedJob(Exception):
+    """Job prioritas rendah yang dibuang karena terlalu lama antre."""
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_at(self, now):
+        """Waktu (monotonic) paling awal bucket ini punya satu token."""
+        self._refill(now)
+        at = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(at, self.blocked_until)
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until):
+        self.blocked_until = max(self.blocked_until, until)
+
+    def idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class _Job:
+    __slots__ = ('priority', 'seq', 'chat_id', 'func', 'args', 'kwargs', 'future', 'attempts', 'not_before', 'label',
+                 'enqueued', 'started', 'idempotent', 'supersede_key')
+
+    def __init__(self, priority, seq, chat_id, func, args, kwargs, label, idempotent, supersede_key=None):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.attempts = 0
+        self.not_before = 0.0
+        self.label = label
+        self.enqueued = time.monotonic()
+        self.started = 0.0
+        self.idempotent = idempotent
+        self.supersede_key = supersede_key
+
+    @property
+    def key(self):
+        return (self.priority, self.seq)
+
+
+class OutboundDispatcher:
+    """
+    Antrian keluar ke Bot API yang sadar rate limit Telegram.
+    Setiap chat punya antrian sendiri (diurutkan menurut prioritas lalu urutan masuk) dan token
+    bucket sendiri; chat yang siap kirim masuk ke satu heap 'ready', sehingga chat yang sedang
+    sibuk atau kehabisan token tidak dipindai ulang di setiap dispatch. Panggilan tanpa chat
+    (hapus pesan, jawaban callback) hanya melewati limit global.
+    Balasan 429 dihormati lewat 'retry_after'. Error lain hanya diulang bila permintaan jelas
+    belum terkirim, atau bila method-nya aman diulang (edit, hapus); sendMessage tidak pernah
+    dikirim dua kali. Job hype/sapaan yang antre lebih dari STALE_SECONDS dibuang.
+    Edit ke pesan yang sama saling menggantikan: edit yang masih antre (mis. menunggu retry 429)
+    dibuang begitu ada edit yang lebih baru, jadi jawaban AI final tidak tertimpa potongan lama.
+    """
+    MAX_ATTEMPTS = 5
+    BASE_BACKOFF_SECONDS = 1.0
+    MAX_CHAT_BUCKETS = 5000
+    STALE_SECONDS = 60.0
+    STALE_PRIORITY = Priority.CHATTER
+    # Nama kelas error koneksi yang terjadi sebelum satu byte permintaan terkirim (requests/urllib3/httpx).
+    PRE_SEND_ERRORS = frozenset({'ConnectTimeout', 'ConnectError', 'NewConnectionError', 'NameResolutionError'})
+
+    def __init__(self, bot, workers=4, global_rate=30.0, chat_rate=1.0, chat_burst=3):
+        self.bot = bot
+        self.workers = max(1, int(workers))
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._global = TokenBucket(global_rate, global_rate, time.monotonic())
+        self._global_jobs = []   # heap (priority, seq, job) untuk job tanpa chat yang siap
+        self._chat_queues = {}   # chat_id -> heap (priority, seq, job)
+        self._ready = []         # heap (priority, seq, chat_id); entri basi dibuang saat di-pop
+        self._in_ready = {}      # chat_id -> key entri 'ready' yang berlaku
+        self._timers = []        # heap (waktu, seq, chat_id, job): chat menunggu token/retry, atau job global menunggu retry
+        self._timer_at = {}      # chat_id -> waktu timer terdekat yang sudah terpasang
+        self._chats = {}
+        self._busy_chats = set()
+        self._latest_edit = {}   # (chat_id, message_id) -> seq edit terbaru
+        self._size = 0
+        self._threads = []
+        self.stats = {'sent': 0, 'failed': 0, 'retries': 0, 'rate_limited': 0, 'dropped': 0, 'superseded': 0}
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"outbound-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    # --- API publik ---
+
+    def submit(self, priority, chat_id, func, /, *args, **kwargs):
+        """
+        Mengantrikan func(*args, **kwargs). chat_id=None berarti hanya limit global yang berlaku.
+        Parameter routing positional-only agar kwargs Bot API seperti chat_id= diteruskan ke func.
+        """
+        return self._enqueue(priority, chat_id, func, args, kwargs, idempotent=False)
+
+    def _enqueue(self, priority, chat_id, func, args, kwargs, idempotent, supersede_key=None):
+        self.start()
+        label = getattr(func, '__name__', 'call')
+        with self._cond:
+            job = _Job(priority, next(self._counter), chat_id, func, args, kwargs, label, idempotent, supersede_key)
+            if supersede_key is not None:
+                self._latest_edit[supersede_key] = job.seq
+            self._push(job, time.monotonic())
+            self._notify()
+        return job.future
+
+    def _notify(self):
+        """Dipanggil dengan lock: membangunkan worker yang menunggu."""
+        self._cond.notify()
+
+    def send_message(self, chat_id, text, priority=Priority.REPLY, **kwargs):
+        return self.submit(priority, chat_id, self.bot.send_message, chat_id, text, **kwargs)
+
+    def reply_to(self, message, text, priority=Priority.REPLY, **kwargs):
+        return self.submit(priority, message.chat.id, self.bot.reply_to, message, text, **kwargs)
+
+    def edit_message_text(self, text, chat_id, message_id, priority=Priority.REPLY, **kwargs):
+        kwargs.update(chat_id=chat_id, message_id=message_id)
+        return self._enqueue(priority, chat_id, self.bot.edit_message_text, (text,), kwargs, idempotent=True,
+                             supersede_key=(chat_id, message_id))
+
+    def delete_message(self, chat_id, message_id, priority=Priority.MODERATION):
+        # Hanya limit global: hapus spam saat raid tidak boleh antre di belakang bucket kirim per chat.
+        return self._enqueue(priority, None, self.bot.delete_message, (chat_id, message_id), {}, idempotent=True)
+
+    def answer_callback_query(self, callback_query_id, priority=Priority.CALLBACK, **kwargs):
+        # Tidak terikat ke chat mana pun, jadi hanya limit global yang berlaku.
+        return self._enqueue(priority, None, self.bot.answer_callback_query, (callback_query_id,), kwargs, idempotent=True)
+
+    def depth(self):
+        with self._cond:
+            return self._size
+
+    def oldest_age(self):
+        """Umur (detik) job tertua yang masih antre, termasuk yang menunggu retry."""
+        with self._cond:
+            enqueued = [entry[2].enqueued for entry in self._global_jobs]
+            enqueued.extend(entry[3].enqueued for entry in self._timers if entry[3] is not None)
+            enqueued.extend(entry[2].enqueued for queue in self._chat_queues.values() for entry in queue)
+            return time.monotonic() - min(enqueued) if enqueued else 0.0
+
+    def snapshot(self):
+        return dict(self.stats, depth=self.depth(), oldest_age=round(self.oldest_age(), 3), chat_buckets=len(self._chats))
+
+    # --- Penjadwalan (semua dipanggil dengan lock) ---
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_CHAT_BUCKETS:
+                self._evict_idle_buckets(now)
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket
+
+    def _evict_idle_buckets(self, now):
+        for chat_id in [c for c, b in self._chats.items() if c not in self._busy_chats and c not in self._chat_queues and b.idle(now)]:
+            del self._chats[chat_id]
+
+    def _push(self, job, now):
+        self._size += 1
+        if job.chat_id is None:
+            if job.not_before > now:
+                heapq.heappush(self._timers, (job.not_before, job.seq, None, job))
+            else:
+                heapq.heappush(self._global_jobs, (job.priority, job.seq, job))
+            return
+        heapq.heappush(self._chat_queues.setdefault(job.chat_id, []), (job.priority, job.seq, job))
+        self._schedule_chat(job.chat_id, now)
+
+    def _schedule_chat(self, chat_id, now):
+        """Menaruh chat di heap 'ready' bila job terdepannya boleh dikirim sekarang, atau memasang timer."""
+        queue = self._chat_queues.get(chat_id)
+        if not queue or chat_id in self._busy_chats:
+            return
+        head = queue[0][2]
+        at = max(head.not_before, self._chat_bucket(chat_id, now).ready_at(now))
+        if at <= now:
+            if self._in_ready.get(chat_id) != head.key:
+                self._in_ready[chat_id] = head.key
+                heapq.heappush(self._ready, (head.priority, head.seq, chat_id))
+            return
+        self._in_ready.pop(chat_id, None)
+        if self._timer_at.get(chat_id, float('inf')) > at:
+            self._timer_at[chat_id] = at
+            heapq.heappush(self._timers, (at, next(self._counter), chat_id, None))
+
+    def _fire_timers(self, now):
+        while self._timers and self._timers[0][0] <= now:
+            _, _, chat_id, job = heapq.heappop(self._timers)
+            if job is not None:
+                heapq.heappush(self._global_jobs, (job.priority, job.seq, job))
+                continue
+            if self._timer_at.get(chat_id, 0.0) <= now:
+                self._timer_at.pop(chat_id, None)
+            self._schedule_chat(chat_id, now)
+
+    def _ready_head(self):
+        """Entri 'ready' teratas yang masih berlaku (entri basi dibuang)."""
+        while self._ready:
+            priority, seq, chat_id = self._ready[0]
+            if self._in_ready.get(chat_id) == (priority, seq) and chat_id not in self._busy_chats:
+                return self._ready[0]
+            heapq.heappop(self._ready)
+        return None
+
+    def _take_next(self, now):
+        ready = self._ready_head()
+        global_head = self._global_jobs[0] if self._global_jobs else None
+        if ready is None and global_head is None:
+            return None
+        if ready is None or (global_head is not None and global_head[:2] < ready[:2]):
+            return heapq.heappop(self._global_jobs)[2]
+        chat_id = heapq.heappop(self._ready)[2]
+        del self._in_ready[chat_id]
+        queue = self._chat_queues[chat_id]
+        job = heapq.heappop(queue)[2]
+        if not queue:
+            del self._chat_queues[chat_id]
+        return job
+
+    def _is_superseded(self, job):
+        return job.supersede_key is not None and self._latest_edit.get(job.supersede_key) != job.seq
+
+    def _forget_edit(self, job):
+        if job.supersede_key is not None and self._latest_edit.get(job.supersede_key) == job.seq:
+            del self._latest_edit[job.supersede_key]
+
+    def _is_stale(self, job, now):
+        return job.priority >= self.STALE_PRIORITY and job.attempts == 0 and now - job.enqueued > self.STALE_SECONDS
+
+    def _next_job(self):
+        """Dipanggil dengan lock. Mengembalikan (job, None) atau (None, detik_tunggu)."""
+        now = time.monotonic()
+        global_ready = self._global.ready_at(now)
+        if global_ready > now:
+            return None, global_ready - now
+        self._fire_timers(now)
+        while True:
+            job = self._take_next(now)
+            if job is None:
+                return None, (self._timers[0][0] - now) if self._timers else None
+            self._size -= 1
+            if self._is_superseded(job):
+                self.stats['superseded'] += 1
+                job.future.set_result(None)
+            elif self._is_stale(job, now):
+                self.stats['dropped'] += 1
+                job.future.set_exception(DroppedJob(f"{job.label} antre {now - job.enqueued:.0f} detik"))
+            else:
+                break
+            if job.chat_id is not None:
+                self._schedule_chat(job.chat_id, now)
+        self._global.take(now)
+        if job.attempts == 0:
+            metrics.observe('outbound_queue_wait_seconds', (('priority', job.priority),), now - job.enqueued)
+        if job.chat_id is not None:
+            self._chat_bucket(job.chat_id, now).take(now)
+            self._busy_chats.add(job.chat_id)
+        return job, None
+
+    def _release(self, job, now):
+        self._forget_edit(job)
+        if job.chat_id is not None:
+            self._busy_chats.discard(job.chat_id)
+            self._schedule_chat(job.chat_id, now)
+
+    def _requeue(self, job, delay):
+        now = time.monotonic()
+        job.not_before = now + delay
+        self._push(job, now)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    job, wait_for = self._next_job()
+                    if job:
+                        break
+                    self._cond.wait(wait_for)
+            self._execute(job)
+
+    @staticmethod
+    def _retry_after(exc):
+        # ApiTelegramException (telebot) dan TelegramApiError (mode async) sama-sama punya error_code/result_json.
+        if getattr(exc, 'error_code', None) != 429:
+            return None
+        params = (getattr(exc, 'result_json', None) or {}).get('parameters') or {}
+        return float(params.get('retry_after', 1))
+
+    @classmethod
+    def _not_sent(cls, exc):
+        """True jika error terjadi sebelum permintaan terkirim (koneksi gagal dibuka)."""
+        if any(klass.__name__ in cls.PRE_SEND_ERRORS for klass in type(exc).__mro__):
+            return True
+        # requests membungkus NewConnectionError dari urllib3 di dalam ConnectionError biasa.
+        return 'NewConnectionError' in str(exc) or 'Failed to establish a new connection' in str(exc)
+
+    @classmethod
+    def _is_retryable(cls, job, exc):
+        code = getattr(exc, 'error_code', None)
+        if code == 429:
+            return True
+        if isinstance(code, int):
+            # Error 4xx (mis. pesan sudah dihapus) tidak akan berhasil jika diulang; 5xx hanya untuk method idempoten.
+            return code >= 500 and job.idempotent
+        # Timeout baca atau koneksi terputus: permintaan mungkin sudah diproses Telegram.
+        return job.idempotent or cls._not_sent(exc)
+
+    def _execute(self, job):
+        job.attempts += 1
+        job.started = time.monotonic()
+        try:
+            result = job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            self._complete(job, error=e)
+            return
+        self._complete(job, result=result)
+
+    def _complete(self, job, result=None, error=None):
+        """Mencatat hasil satu percobaan: menyelesaikan Future atau mengantrikan ulang job."""
+        elapsed = time.monotonic() - job.started
+        if error is None:
+            metrics.observe('telegram_api_seconds', (('method', job.label), ('outcome', 'ok')), elapsed)
+            with self._cond:
+                self._release(job, time.monotonic())
+                self.stats['sent'] += 1
+                self._notify()
+            job.future.set_result(result)
+            return
+        retry_after = self._retry_after(error)
+        metrics.observe('telegram_api_seconds', (('method', job.label), ('outcome', 'rate_limited' if retry_after is not None else 'error')), elapsed)
+        with self._cond:
+            now = time.monotonic()
+            if retry_after is not None:
+                self.stats['rate_limited'] += 1
+                if job.chat_id is not None:
+                    self._chat_bucket(job.chat_id, now).block(now + retry_after)
+                else:
+                    self._global.block(now + retry_after)
+                logger.warning(f"Rate limit Telegram ({job.label}, chat {job.chat_id}): coba lagi dalam {retry_after} detik.")
+            if self._is_superseded(job):
+                # Edit yang lebih baru sudah antre; tidak ada gunanya mengulang yang ini.
+                self._release(job, now)
+                self.stats['superseded'] += 1
+                self._notify()
+                job.future.set_result(None)
+                return
+            if job.attempts < self.MAX_ATTEMPTS and self._is_retryable(job, error):
+                self.stats['retries'] += 1
+                delay = retry_after if retry_after is not None else self.BASE_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+                self._busy_chats.discard(job.chat_id)
+                self._requeue(job, delay)
+                self._notify()
+                return
+            self._release(job, now)
+            self.stats['failed'] += 1
+            self._notify()
+        logger.error(f"Gagal mengirim {job.label} ke chat {job.chat_id} setelah {job.attempts} percobaan: {error}")
+        job.future.set_exception(error)
@@ -0,0 +1,109 @@
+import logging
+import threading
+
+from webhook_setup import ALLOWED_UPDATES
+
+logger = logging.getLogger(__name__)
+
+
+class OffsetStore:
+    """
+    Menyimpan offset getUpdates berikutnya di tabel 'polling_offsets', satu baris per bot.
+    Upsert memakai GREATEST agar offset tidak pernah mundur. Tanpa DB, offset hanya di memori.
+    """
+    def __init__(self, db, bot_id):
+        self.db = db
+        self.bot_id = int(bot_id)
+
+    def ensure_table(self):
+        if not self.db.available:
+            return
+        try:
+            self.db.execute("CREATE TABLE IF NOT EXISTS polling_offsets (bot_id BIGINT PRIMARY KEY, next_offset BIGINT NOT NULL, updated_at TIMESTAMPTZ NOT NULL DEFAULT now())")
+            logger.info("Tabel database 'polling_offsets' siap.")
+        except Exception as e:
+            logger.error(f"Gagal membuat tabel offset polling: {e}")
+
+    def load(self):
+        if not self.db.available:
+            return None
+        try:
+            rows = self.db.fetch_prepared('offset_select', (self.bot_id,))
+        except Exception as e:
+            logger.error(f"Gagal memuat offset polling: {e}")
+            return None
+        return rows[0][0] if rows else None
+
+    def save(self, next_offset):
+        if not self.db.available:
+            return True
+        try:
+            self.db.execute_prepared('offset_upsert', (self.bot_id, int(next_offset)))
+            return True
+        except Exception as e:
+            logger.error(f"Gagal menyimpan offset polling {next_offset}: {e}")
+            return False
+
+
+class UpdatePoller:
+    """
+    Ingest update lewat long polling getUpdates, sebagai alternatif webhook.
+    Setiap batch (maks. 100 update) diserahkan utuh ke process_batch, lalu offset
+    berikutnya dicatat ke Postgres sebelum batch baru diminta. Restart melanjutkan dari
+    offset tersimpan: update yang sudah selesai tidak diulang dan yang belum tidak hilang.
+    """
+    MAX_BACKOFF_SECONDS = 30
+
+    def __init__(self, bot, process_batch, offset_store, batch_size=100, poll_timeout=30):
+        self.bot = bot
+        self.process_batch = process_batch
+        self.offset_store = offset_store
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.offset = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self.stats = {'batches': 0, 'updates': 0, 'errors': 0, 'checkpoint_errors': 0}
+
+    def start(self):
+        if self._thread:
+            return
+        self.offset_store.ensure_table()
+        self.offset = self.offset_store.load()
+        # getUpdates ditolak Telegram (409) selama webhook masih terpasang.
+        self.bot.remove_webhook()
+        logger.info(f"Mode polling aktif, mulai dari offset {self.offset}.")
+        self._thread = threading.Thread(target=self._run, name="update-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                updates = self.bot.get_updates(offset=self.offset, limit=self.batch_size, timeout=self.poll_timeout + 10,
+                                               allowed_updates=ALLOWED_UPDATES, long_polling_timeout=self.poll_timeout)
+                backoff = 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"getUpdates gagal, coba lagi dalam {backoff} detik: {e}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF_SECONDS)
+                continue
+            if not updates:
+                continue
+            try:
+                self.process_batch(updates)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Error memproses batch {len(updates)} update: {e}", exc_info=True)
+            self.offset = max(update.update_id for update in updates) + 1
+            self.stats['batches'] += 1
+            self.stats['updates'] += len(updates)
+            if not self.offset_store.save(self.offset):
+                self.stats['checkpoint_errors'] += 1
+
+    def snapshot(self):
+        return dict(self.stats, offset=self.offset, batch_size=self.batch_size)
@@ -0,0 +1,169 @@
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Profiler statistik yang dinyalakan sesaat dari /profile. Thread latar membaca stack semua thread
+    lewat sys._current_frames() tiap 'interval' detik dan menghitung fungsi yang sedang berjalan
+    (self) serta semua fungsi di stack (kumulatif). Saat mati tidak ada thread sampler sama sekali;
+    biaya di jalur panas hanya satu pemeriksaan atribut di counted().
+    """
+    MAX_DEPTH = 64
+
+    def __init__(self, output_dir, interval=0.005, max_seconds=300):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.active = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._busy = set()  # ident thread yang sedang menjalankan handler
+        self._thread = None
+        self._on_done = None
+        self._reset()
+        self.last_report = None
+
+    def _reset(self, seconds=None, updates=None, all_threads=False):
+        self.seconds = seconds
+        self.max_updates = updates
+        self.all_threads = all_threads
+        self.updates = 0
+        self.samples = 0
+        self.started = None
+        self._self_counts = Counter()
+        self._cumulative_counts = Counter()
+        self._stacks = Counter()
+
+    def counted(self, handler):
+        """Membungkus handler: menandai thread sebagai sibuk dan menghitung update selama profiling aktif."""
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            if not self.active:
+                return handler(*args, **kwargs)
+            ident = threading.get_ident()
+            self._busy.add(ident)
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                self._busy.discard(ident)
+                self._note_update()
+        return wrapper
+
+    def _note_update(self):
+        with self._lock:
+            self.updates += 1
+            if self.max_updates and self.updates >= self.max_updates:
+                self._stop.set()
+
+    def start(self, seconds=None, updates=None, all_threads=False, on_done=None):
+        """Mulai profiling untuk 'updates' update berikutnya atau 'seconds' detik (mana yang lebih dulu). False jika sudah aktif."""
+        with self._lock:
+            if self.active:
+                return False
+            if not seconds and not updates:
+                seconds = 30
+            seconds = min(seconds or self.max_seconds, self.max_seconds)
+            self._reset(seconds, updates, all_threads)
+            self._on_done = on_done
+            self._stop.clear()
+            self.started = time.monotonic()
+            self.active = True
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        logger.warning(f"Profiling dimulai: {seconds:g} detik, update={updates or '-'}, semua_thread={all_threads}.")
+        return True
+
+    def stop(self):
+        """Menghentikan profiling lebih awal; laporan tetap ditulis."""
+        if not self.active:
+            return False
+        self._stop.set()
+        return True
+
+    def _run(self):
+        deadline = self.started + self.seconds
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            self._sample(own)
+        # 'active' baru dimatikan setelah laporan ditulis, jadi start() tidak bisa me-reset penghitung di tengah jalan.
+        try:
+            with self._lock:
+                updates = self.updates
+            report = self._write_report(time.monotonic() - self.started, updates)
+        except Exception as e:
+            logger.error(f"Gagal menulis laporan profiling: {e}", exc_info=True)
+            return
+        finally:
+            self._busy.clear()
+            self.active = False
+        self.last_report = report
+        logger.warning(f"Profiling selesai: {report['samples']} sampel, {report['updates']} update -> {report['path']}")
+        if self._on_done:
+            try:
+                self._on_done(report)
+            except Exception as e:
+                logger.error(f"Gagal mengirim ringkasan profiling: {e}", exc_info=True)
+
+    @staticmethod
+    def _label(code):
+        return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}:{code.co_firstlineno}"
+
+    def _sample(self, own):
+        busy = self._busy
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (not self.all_threads and ident not in busy):
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.MAX_DEPTH:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if not stack:
+                continue
+            self.samples += 1
+            self._self_counts[stack[0]] += 1
+            self._cumulative_counts.update(set(stack))
+            self._stacks[";".join(reversed(stack))] += 1
+
+    def _top(self, counts, limit):
+        total = self.samples or 1
+        return [(label, count, round(100.0 * count / total, 1)) for label, count in counts.most_common(limit)]
+
+    def _write_report(self, elapsed, updates):
+        """Menulis ringkasan teks (.txt) dan stack terlipat (.folded, siap untuk flamegraph) ke output_dir."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        report = {
+            'path': base + ".txt",
+            'folded_path': base + ".folded",
+            'seconds': round(elapsed, 1),
+            'samples': self.samples,
+            'updates': updates,
+            'top_self': self._top(self._self_counts, 30),
+            'top_cumulative': self._top(self._cumulative_counts, 30),
+        }
+        with open(report['path'], 'w', encoding='utf-8') as handle:
+            handle.write(f"# {report['samples']} sampel, {report['updates']} update, {report['seconds']} detik, interval {self.interval * 1000:g} ms\n")
+            for title, rows in (("self", report['top_self']), ("kumulatif", report['top_cumulative'])):
+                handle.write(f"\n## Teratas ({title})\n")
+                for label, count, pct in rows:
+                    handle.write(f"{pct:6.1f}%  {count:7d}  {label}\n")
+        with open(report['folded_path'], 'w', encoding='utf-8') as handle:
+            for stack, count in self._stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+        return report
+
+    def snapshot(self):
+        payload = {'active': int(self.active), 'samples': self.samples, 'updates': self.updates}
+        if self.last_report:
+            payload['last_samples'] = self.last_report['samples']
+            payload['last_seconds'] = self.last_report['seconds']
+        return payload
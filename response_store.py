@@ -0,0 +1,51 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseStore:
+    """
+    Menyimpan set respons hasil pembaruan AI ke tabel berversi 'response_versions'.
+    Setiap pembaruan menulis satu baris baru berisi seluruh set (JSONB), sehingga
+    versi lama tetap bisa dilihat dan restart cukup memuat versi terbaru.
+    """
+    def __init__(self, db):
+        self.db = db
+
+    def ensure_table(self):
+        if not self.db.available:
+            return
+        try:
+            self.db.execute("CREATE TABLE IF NOT EXISTS response_versions (version SERIAL PRIMARY KEY, created_at TIMESTAMPTZ NOT NULL DEFAULT now(), responses JSONB NOT NULL)")
+            logger.info("Tabel database 'response_versions' siap.")
+        except Exception as e:
+            logger.error(f"Gagal membuat tabel respons: {e}")
+
+    def load_latest(self):
+        """Mengembalikan (version, responses) terbaru, atau (None, None) jika belum ada."""
+        if not self.db.available:
+            return None, None
+        try:
+            rows = self.db.fetch_prepared('responses_latest')
+        except Exception as e:
+            logger.error(f"Gagal memuat respons tersimpan: {e}")
+            return None, None
+        if not rows:
+            return None, None
+        version, responses = rows[0]
+        if isinstance(responses, str):
+            responses = json.loads(responses)
+        return version, responses
+
+    def save(self, responses):
+        if not self.db.available:
+            return None
+        try:
+            rows = self.db.fetch_prepared('responses_insert', (json.dumps(responses),))
+            version = rows[0][0] if rows else None
+            logger.info(f"Set respons disimpan sebagai versi {version}.")
+            return version
+        except Exception as e:
+            logger.error(f"Gagal menyimpan set respons: {e}")
+            return None
@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleState:
+    """
+    Cache in-memory untuk tabel 'schedule_log'.
+    Semua baris dimuat sekali dengan satu query, lalu pertanyaan "sudah jalan
+    hari ini/minggu ini?" dijawab dari memori tanpa round trip ke DB.
+    DB hanya disentuh saat tugas benar-benar berjalan (write-through) atau
+    saat pemuatan sebelumnya gagal dan perlu diulang.
+    """
+    RELOAD_BACKOFF_SECONDS = 60
+
+    def __init__(self, db):
+        self.db = db
+        self._markers = {}
+        self._loaded = False
+        self._last_load_attempt = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Memuat semua penanda jadwal dengan satu SELECT. Mengembalikan True jika berhasil."""
+        with self._lock:
+            self._last_load_attempt = time.time()
+            if not self.db.available:
+                return False
+            try:
+                rows = self.db.fetch_prepared('schedule_select_all')
+                # Penanda lokal yang lebih baru (ditulis saat DB mati) tetap dipertahankan.
+                for task_name, last_run_date in rows:
+                    self._markers.setdefault(task_name, last_run_date)
+                self._loaded = True
+                logger.info(f"State jadwal dimuat: {len(rows)} entri.")
+                return True
+            except Exception as e:
+                logger.error(f"Gagal memuat state jadwal: {e}")
+                return False
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        if time.time() - self._last_load_attempt >= self.RELOAD_BACKOFF_SECONDS:
+            self.load()
+
+    def last_run(self, task_name):
+        self._ensure_loaded()
+        return self._markers.get(task_name)
+
+    def mark_run(self, task_name, run_marker):
+        # Memori diperbarui lebih dulu agar tugas tidak diulang meskipun DB sedang gagal.
+        self._markers[task_name] = run_marker
+        if not self.db.available: return
+        try:
+            self.db.execute_prepared('schedule_upsert', (task_name, run_marker))
+        except Exception as e:
+            logger.error(f"Gagal memperbarui DB untuk {task_name}: {e}")
+
+    def claim_run(self, task_name, run_marker):
+        """
+        Klaim atomik untuk mode multi-instance: hanya satu node yang berhasil menulis
+        penanda baru. Mengembalikan True jika node ini menang; melempar exception jika
+        DB tidak bisa dihubungi agar penjadwal mencoba lagi nanti.
+        """
+        if not self.db.available:
+            raise RuntimeError("DB tidak tersedia untuk klaim jadwal")
+        won = bool(self.db.fetch_prepared('schedule_claim', (task_name, run_marker)))
+        self._markers[task_name] = run_marker
+        return won
@@ -0,0 +1,103 @@
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleRunner:
+    """
+    Penjadwal dengan thread sendiri untuk tugas harian dan mingguan.
+    Waktu tembak berikutnya setiap entri disimpan di min-heap, dan satu thread tidur
+    sampai entri terawal jatuh tempo. Tugas yang terlewat hari ini (mis. karena
+    container sedang tidur) langsung dijalankan saat startup, sama seperti sebelumnya.
+    """
+    # Batas tidur agar perubahan jam sistem atau suspend container cepat terdeteksi.
+    MAX_SLEEP_SECONDS = 60
+    RETRY_DELAY = timedelta(minutes=5)
+
+    def __init__(self, schedules, schedule_state, clock=None, claim_runs=False):
+        self.schedules = schedules
+        self.schedule_state = schedule_state
+        # Mode scale-out: klaim tugas di Postgres sebelum menjalankannya agar hanya satu replika yang menang.
+        self.claim_runs = claim_runs
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._heap = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    @staticmethod
+    def run_marker(schedule, now_utc):
+        return now_utc.strftime('%Y-W%U') if 'day_of_week' in schedule else now_utc.strftime('%Y-%m-%d')
+
+    def _is_due(self, name, schedule, now_utc):
+        if now_utc.hour < schedule['hour']:
+            return False
+        if 'day_of_week' in schedule and now_utc.weekday() != schedule['day_of_week']:
+            return False
+        return self.schedule_state.last_run(name) != self.run_marker(schedule, now_utc)
+
+    def next_fire_time(self, name, schedule, now_utc):
+        """Waktu tembak berikutnya; 'now_utc' jika tugas sudah jatuh tempo tapi belum jalan."""
+        if self._is_due(name, schedule, now_utc):
+            return now_utc
+        candidate = now_utc.replace(hour=schedule['hour'], minute=0, second=0, microsecond=0)
+        if candidate <= now_utc:
+            candidate += timedelta(days=1)
+        if 'day_of_week' in schedule:
+            candidate += timedelta(days=(schedule['day_of_week'] - candidate.weekday()) % 7)
+        return candidate
+
+    def start(self):
+        with self._cond:
+            if self._thread:
+                return
+            now_utc = self._clock()
+            for name, schedule in self.schedules.items():
+                heapq.heappush(self._heap, (self.next_fire_time(name, schedule, now_utc), name))
+            self._thread = threading.Thread(target=self._run, name="schedule-runner", daemon=True)
+            self._thread.start()
+        logger.info(f"Penjadwal dimulai; tugas berikutnya: {self._heap[0][1]} pada {self._heap[0][0].isoformat()}" if self._heap else "Penjadwal dimulai tanpa tugas.")
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait_for = (self._heap[0][0] - self._clock()).total_seconds()
+                    if wait_for <= 0:
+                        break
+                    self._cond.wait(min(wait_for, self.MAX_SLEEP_SECONDS))
+                if self._stopped:
+                    return
+                _, name = heapq.heappop(self._heap)
+            schedule = self.schedules[name]
+            now_utc = self._clock()
+            next_fire = None
+            if self._is_due(name, schedule, now_utc):
+                try:
+                    marker = self.run_marker(schedule, now_utc)
+                    if self.claim_runs:
+                        if self.schedule_state.claim_run(name, marker):
+                            logger.info(f"Menjalankan tugas terjadwal (diklaim): {name} pada {now_utc.isoformat()}")
+                            schedule['task'](*schedule.get('args', ()))
+                        else:
+                            logger.info(f"Tugas terjadwal {name} sudah diklaim instance lain.")
+                    else:
+                        logger.info(f"Menjalankan tugas terjadwal: {name} pada {now_utc.isoformat()}")
+                        schedule['task'](*schedule.get('args', ()))
+                        self.schedule_state.mark_run(name, marker)
+                except Exception as e:
+                    logger.error(f"Error menjalankan tugas terjadwal {name}: {e}", exc_info=True)
+                    next_fire = self._clock() + self.RETRY_DELAY
+            with self._cond:
+                heapq.heappush(self._heap, (next_fire or self.next_fire_time(name, schedule, self._clock()), name))
@@ -0,0 +1,50 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState:
+    """
+    State bersama antar-instance untuk mode scale-out (SCALE_OUT=true).
+    Cooldown diklaim secara atomik lewat upsert bersyarat di Postgres, dan daftar
+    admin per chat dibagikan agar setiap replika tidak perlu memanggil Telegram sendiri.
+    """
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def available(self):
+        return self.db.available
+
+    def ensure_tables(self):
+        if not self.db.available:
+            return
+        try:
+            self.db.execute("CREATE TABLE IF NOT EXISTS bot_cooldowns (scope TEXT PRIMARY KEY, until TIMESTAMPTZ NOT NULL)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS chat_admins (chat_id BIGINT PRIMARY KEY, admin_ids BIGINT[] NOT NULL, updated_at TIMESTAMPTZ NOT NULL DEFAULT now())")
+            logger.info("Tabel state bersama siap.")
+        except Exception as e:
+            logger.error(f"Gagal membuat tabel state bersama: {e}")
+
+    def claim_cooldown(self, scope, seconds):
+        """True jika instance ini memenangkan cooldown 'scope' (belum diklaim atau sudah kedaluwarsa)."""
+        try:
+            return bool(self.db.fetch_prepared('cooldown_claim', (scope, float(seconds))))
+        except Exception as e:
+            logger.error(f"Gagal mengklaim cooldown {scope}: {e}")
+            return False
+
+    def load_admins(self, chat_id, max_age_seconds):
+        """Mengembalikan set admin yang masih segar dari DB, atau None."""
+        try:
+            rows = self.db.fetch_prepared('admins_select', (int(chat_id), float(max_age_seconds)))
+        except Exception as e:
+            logger.error(f"Gagal memuat admin bersama untuk {chat_id}: {e}")
+            return None
+        return set(rows[0][0]) if rows else None
+
+    def store_admins(self, chat_id, admin_ids):
+        try:
+            self.db.execute_prepared('admins_upsert', (int(chat_id), sorted(admin_ids)))
+        except Exception as e:
+            logger.error(f"Gagal menyimpan admin bersama untuk {chat_id}: {e}")
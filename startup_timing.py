@@ -0,0 +1,35 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Mencatat durasi tiap fase startup dan waktu sampai update pertama selesai diproses."""
+    def __init__(self, started=None):
+        self.started = started or time.perf_counter()
+        self._last = self.started
+        self.phases = []
+        self.first_update_seconds = None
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def log(self):
+        breakdown = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases)
+        logger.info(f"⏱️ Startup selesai dalam {self._last - self.started:.3f} detik: {breakdown}")
+
+    def first_update_done(self):
+        if self.first_update_seconds is not None:
+            return
+        self.first_update_seconds = time.perf_counter() - self.started
+        logger.info(f"⏱️ Update pertama selesai diproses {self.first_update_seconds:.3f} detik setelah proses dimulai.")
+
+    def snapshot(self):
+        stats = {name: round(seconds, 4) for name, seconds in self.phases}
+        stats['total'] = round(self._last - self.started, 4)
+        if self.first_update_seconds is not None:
+            stats['first_update'] = round(self.first_update_seconds, 4)
+        return stats
@@ -0,0 +1,44 @@
+import time
+
+
+class ThrottledEditor:
+    """
+    Mengedit satu pesan secara bertahap saat jawaban AI mengalir masuk.
+    Edit dibatasi maksimal sekali per 'min_interval' detik dan hanya jika teks
+    bertambah minimal 'min_growth' karakter, agar tidak melewati limit edit Telegram.
+    Edit parsial yang tertahan retry 429 dibuang oleh OutboundDispatcher begitu edit final
+    untuk pesan yang sama diantrikan, sehingga potongan lama tidak menimpa jawaban lengkap.
+    """
+    def __init__(self, outbound, chat_id, message_future, min_interval=1.0, min_growth=20):
+        self.outbound = outbound
+        self.chat_id = chat_id
+        self.message_future = message_future
+        self.min_interval = min_interval
+        self.min_growth = min_growth
+        self.last_text = ""
+        self._last_edit_at = 0.0
+        self._pending_edit = None
+        self.edits = 0
+
+    def update(self, text):
+        """Dipanggil untuk setiap potongan token; tidak pernah memblokir."""
+        now = time.monotonic()
+        if now - self._last_edit_at < self.min_interval or len(text) - len(self.last_text) < self.min_growth:
+            return
+        # Jangan menumpuk edit: tunggu pesan "thinking" terkirim dan edit sebelumnya selesai.
+        if not self.message_future.done() or self.message_future.exception() is not None:
+            return
+        if self._pending_edit is not None and not self._pending_edit.done():
+            return
+        message = self.message_future.result()
+        self._pending_edit = self.outbound.edit_message_text(text + " ▌", self.chat_id, message.message_id)
+        self._last_edit_at = now
+        self.last_text = text
+        self.edits += 1
+
+    def wait_pending(self, timeout=5):
+        if self._pending_edit is not None:
+            try:
+                self._pending_edit.result(timeout=timeout)
+            except Exception:
+                pass
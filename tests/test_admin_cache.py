@@ -0,0 +1,99 @@
+import threading
+import time
+
+from admin_cache import AdminCache
+
+
+class Loader:
+    def __init__(self, admins):
+        self.admins = admins
+        self.calls = []
+        self.fail = False
+        self.delay = 0.0
+
+    def __call__(self, chat_id, fresh=False):
+        self.calls.append((chat_id, fresh))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("telegram down")
+        return set(self.admins)
+
+
+def wait_idle(cache, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while cache.snapshot()['refreshing'] and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_cold_miss_waits_for_one_fetch():
+    loader = Loader({7})
+    cache = AdminCache(loader)
+    assert cache.is_admin(-1, 7) is True
+    assert cache.is_admin(-1, 8) is False
+    assert loader.calls == [(-1, False)]
+    assert cache.snapshot()['blocking_fetches'] == 1
+
+
+def test_concurrent_cold_misses_share_one_fetch():
+    loader = Loader({7})
+    loader.delay = 0.05
+    cache = AdminCache(loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.is_admin(-1, 7))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 5
+    assert len(loader.calls) == 1
+
+
+def test_stale_entry_served_while_refreshing_in_background():
+    loader = Loader({7})
+    cache = AdminCache(loader, ttl_seconds=10, refresh_ahead=0.0)
+    assert cache.is_admin(-1, 7)
+    loader.admins = set()
+    loader.delay = 0.05
+    # Di bawah TTL: jawaban lama langsung dipakai, refresh berjalan di latar.
+    assert cache.is_admin(-1, 7) is True
+    wait_idle(cache)
+    assert cache.is_admin(-1, 7) is False
+
+
+def test_hard_ttl_forces_refetch():
+    loader = Loader({7})
+    cache = AdminCache(loader, ttl_seconds=0.05)
+    assert cache.is_admin(-1, 7)
+    wait_idle(cache)
+    loader.admins = set()
+    time.sleep(0.06)
+    assert cache.is_admin(-1, 7) is False
+    assert cache.snapshot()['expired'] == 1
+
+
+def test_expired_entry_fails_closed_when_refresh_fails():
+    loader = Loader({7})
+    cache = AdminCache(loader, ttl_seconds=0.05, failure_backoff=60)
+    assert cache.is_admin(-1, 7)
+    wait_idle(cache)
+    loader.fail = True
+    time.sleep(0.06)
+    assert cache.is_admin(-1, 7) is False
+    calls = len(loader.calls)
+    # Selama backoff tidak ada pengambilan baru yang ditunggu.
+    assert cache.is_admin(-1, 7) is False
+    assert len(loader.calls) == calls
+    assert cache.snapshot()['fail_closed'] == 2
+
+
+def test_member_update_applies_immediately_and_refetches_fresh():
+    loader = Loader({7, 8})
+    cache = AdminCache(loader)
+    assert cache.is_admin(-1, 8)
+    loader.admins = {7}
+    cache.apply_member_update(-1, 8, 'member')
+    assert cache.is_admin(-1, 8) is False
+    wait_idle(cache)
+    assert loader.calls[-1] == (-1, True)
+    assert cache.is_admin(-1, 8) is False
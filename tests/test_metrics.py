@@ -0,0 +1,25 @@
+import gc
+import threading
+
+from metrics import Metrics
+
+
+def test_dead_thread_shards_are_folded_into_retired():
+    metrics = Metrics()
+    metrics.inc('events_total', (('kind', 'a'),))
+
+    def work():
+        metrics.inc('events_total', (('kind', 'a'),), 2)
+        metrics.observe('work_seconds', (), 0.02)
+
+    for _ in range(20):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    del thread
+    gc.collect()
+
+    assert len(metrics._shards) == 1  # hanya shard thread tes ini
+    text = metrics.render()
+    assert 'npepe_events_total{kind="a"} 41' in text
+    assert 'npepe_work_seconds_count 20' in text
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from moderation import SpamFilter
+
+FORBIDDEN_KEYWORDS = ['airdrop', 'giveaway', 'presale', 'private sale', 'whitelist', 'signal', 'pump group', 'trading signal', 'investment advice', 'other project']
+ALLOWED_DOMAINS = ['pump.fun', 't.me/NPEPEVERSE', 'x.com/NPEPE_Verse', 'base44.app']
+CONTRACT = "So11111111111111111111111111111111111111112"
+OTHER_SOLANA = "7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU"
+EVM = "0x6982508145454ce325ddbe47a25d4ec3d2311933"
+
+
+@pytest.fixture
+def spam_filter():
+    return SpamFilter(FORBIDDEN_KEYWORDS, ALLOWED_DOMAINS, CONTRACT)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("gm frens, wen moon", (False, None)),
+    ("", (False, None)),
+    ("Free airdrop!! claim now", (True, "Forbidden Keyword: airdrop")),
+    ("claim at myairdrop.com", (True, "Forbidden Keyword: airdrop")),
+    ("my.private sale now", (True, "Forbidden Keyword: private sale")),
+    ("check https://evil.com/x", (True, "Unauthorized Link: https://evil.com/x")),
+    ("https://pump.fun.evil.com", (True, "Unauthorized Link: https://pump.fun.evil.com")),
+    ("join t.me/scamgroup", (True, "Unauthorized Link: t.me/scamgroup")),
+    ("official https://x.com/NPEPE_Verse", (False, None)),
+    ("join https://t.me/NPEPEVERSE", (False, None)),
+    ("evil.com without scheme is not a link check", (False, None)),
+    (f"buy https://pump.fun/{CONTRACT}", (False, None)),
+    (f"our CA {CONTRACT}", (False, None)),
+    (f"new gem {OTHER_SOLANA}", (True, "Potential Solana Contract Address")),
+    (f"https://pump.fun/{OTHER_SOLANA}", (True, "Potential Solana Contract Address")),
+    (f"pump.fun/{OTHER_SOLANA} now", (True, "Potential Solana Contract Address")),
+    (f"see evil.com/{EVM}", (True, "Potential EVM Contract Address")),
+    (f"https://evil.com/{EVM}", (True, f"Unauthorized Link: https://evil.com/{EVM}")),
+])
+def test_verdicts(spam_filter, text, expected):
+    assert spam_filter.check(text) == expected
+
+
+def test_strict_mode_rejects_allowed_links(spam_filter):
+    assert spam_filter.check("https://pump.fun") == (False, None)
+    assert spam_filter.check("https://pump.fun", strict=True) == (True, "Raid Mode Link: https://pump.fun")
+
+
+def _best_of(func, runs=3):
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@pytest.mark.parametrize("shape", ["a", "a.", "a-", "a.-", "7x", "0x", "ab/", "."])
+def test_long_tokens_scan_in_linear_time(spam_filter, shape):
+    # "http" membuka pemindaian tautan, jalur terburuk. Regex kuadratik butuh ~64x untuk input 8x lebih panjang.
+    def scan(length):
+        text = "http " + (shape * length)[:length]
+        return lambda: (spam_filter.check(text), spam_filter.check(text, strict=True))
+
+    short = _best_of(scan(2000))
+    long = _best_of(scan(16000))
+    assert long < 0.2
+    assert long < max(short, 1e-4) * 24
@@ -0,0 +1,90 @@
+import pytest
+
+from moderation_log import ModerationLog
+
+
+class FakeDb:
+    def __init__(self):
+        self.available = True
+        self.fail = False
+        self.batches = []
+
+    def execute_values(self, sql, rows):
+        if self.fail:
+            raise RuntimeError("connection refused")
+        self.batches.append(list(rows))
+
+
+@pytest.fixture
+def db():
+    return FakeDb()
+
+
+def record_many(log, count):
+    for message_id in range(count):
+        log.record(-100, 7, message_id, 'delete', "Forbidden Keyword: airdrop")
+
+
+def message_ids(rows):
+    return [row[3] for row in rows]
+
+
+def test_reason_kind_strips_details():
+    assert ModerationLog.reason_kind("Forbidden Keyword: airdrop") == "Forbidden Keyword"
+    assert ModerationLog.reason_kind("Flood (5 msgs)") == "Flood"
+    assert ModerationLog.reason_kind(None) == "unknown"
+
+
+def test_full_buffer_drops_oldest_events(db):
+    log = ModerationLog(db, batch_size=2, max_buffer=5)
+    record_many(log, 8)
+    assert log.snapshot()['buffered'] == 5
+    assert log.stats['dropped'] == 3
+    assert log.flush() == 5
+    assert message_ids(db.batches[0]) == [3, 4, 5, 6, 7]
+
+
+def test_failed_flush_requeues_rows_in_order(db):
+    log = ModerationLog(db, batch_size=10, max_buffer=10)
+    record_many(log, 3)
+    db.fail = True
+    assert log.flush() == 0
+    assert log.stats['flush_errors'] == 1
+    log.record(-100, 7, 3, 'delete', "Spam")
+    db.fail = False
+    assert log.flush() == 4
+    assert message_ids(db.batches[0]) == [0, 1, 2, 3]
+    assert log.stats['written'] == 4
+    assert log.stats['dropped'] == 0
+
+
+def test_requeue_drops_what_no_longer_fits(db):
+    log = ModerationLog(db, batch_size=4, max_buffer=4)
+    record_many(log, 4)
+    db.fail = True
+    # Flush gagal sementara event baru terus masuk dan memenuhi buffer lagi.
+    original = db.execute_values
+
+    def fail_after_refill(sql, batch):
+        for message_id in range(10, 13):
+            log.record(-100, 7, message_id, 'delete', "Spam")
+        original(sql, batch)
+
+    db.execute_values = fail_after_refill
+    assert log.flush() == 0
+    assert log.snapshot()['buffered'] == 4
+    assert log.stats['dropped'] == 3
+    db.execute_values = original
+    db.fail = False
+    log.flush()
+    assert message_ids(db.batches[0]) == [3, 10, 11, 12]
+
+
+def test_disabled_without_database(db):
+    db.available = False
+    log = ModerationLog(db)
+    record_many(log, 3)
+    log.start()
+    assert log._thread is None
+    assert log.flush() == 0
+    assert log.stats['recorded'] == 0
@@ -0,0 +1,62 @@
+import pytest
+
+from near_duplicate import NearDuplicateDetector
+
+SHILL = "huge presale live now join the best new token before launch moon guaranteed"
+VARIANT = "HUGE presale live now!! join the best new token before launch, moon guaranteed 🚀"
+
+
+@pytest.fixture
+def detector():
+    return NearDuplicateDetector(window_seconds=600, min_users=3, min_tokens=6)
+
+
+def test_flags_on_third_distinct_user(detector):
+    assert detector.check(-100, 1, SHILL, now=1000) == (False, None)
+    assert detector.check(-100, 2, VARIANT, now=1001) == (False, None)
+    flagged, reason = detector.check(-100, 3, SHILL, now=1002)
+    assert flagged
+    assert reason == "Near-Duplicate Campaign (3 users)"
+    assert detector.stats['flagged'] == 1
+
+
+def test_same_user_repeating_is_not_a_campaign(detector):
+    for second in range(5):
+        assert detector.check(-100, 1, SHILL, now=1000 + second) == (False, None)
+
+
+def test_short_messages_are_skipped(detector):
+    for user_id in range(5):
+        assert detector.check(-100, user_id, "gm gm frens", now=1000) == (False, None)
+    assert detector.stats['skipped_short'] == 5
+    assert detector.stats['checked'] == 0
+
+
+def test_copies_outside_window_are_forgotten(detector):
+    detector.check(-100, 1, SHILL, now=1000)
+    detector.check(-100, 2, SHILL, now=1001)
+    assert detector.check(-100, 3, SHILL, now=1000 + 601) == (False, None)
+
+
+def test_unrelated_messages_are_not_grouped(detector):
+    detector.check(-100, 1, SHILL, now=1000)
+    detector.check(-100, 2, "does anyone know when the next community call with the team is happening", now=1001)
+    assert detector.check(-100, 3, "my wallet shows the tokens but the chart on dexscreener is not loading", now=1002) == (False, None)
+
+
+def test_chats_are_indexed_separately(detector):
+    detector.check(-100, 1, SHILL, now=1000)
+    detector.check(-200, 2, SHILL, now=1001)
+    assert detector.check(-300, 3, SHILL, now=1002) == (False, None)
+
+
+def test_numbers_do_not_break_similarity(detector):
+    detector.check(-100, 1, "send 100 sol to this wallet and get 200 back instantly no risk", now=1000)
+    detector.check(-100, 2, "send 5 sol to this wallet and get 10 back instantly no risk", now=1001)
+    assert detector.check(-100, 3, "send 42 sol to this wallet and get 84 back instantly no risk", now=1002)[0]
+
+
+def test_min_users_threshold_is_configurable():
+    detector = NearDuplicateDetector(min_users=2, min_tokens=6)
+    detector.check(-100, 1, SHILL, now=1000)
+    assert detector.check(-100, 2, SHILL, now=1001) == (True, "Near-Duplicate Campaign (2 users)")
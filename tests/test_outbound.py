@@ -0,0 +1,194 @@
+import time
+
+import pytest
+
+from outbound import DroppedJob, OutboundDispatcher, Priority
+
+
+class FakeBot:
+    def __init__(self):
+        self.calls = []
+        self.failures = {}  # method -> daftar exception yang dilempar berurutan
+
+    def _call(self, method, *args, **kwargs):
+        self.calls.append((method, args, kwargs))
+        pending = self.failures.get(method)
+        if pending:
+            raise pending.pop(0)
+        return (method, args, kwargs)
+
+    def send_message(self, *args, **kwargs):
+        return self._call('send_message', *args, **kwargs)
+
+    def edit_message_text(self, *args, **kwargs):
+        return self._call('edit_message_text', *args, **kwargs)
+
+    def delete_message(self, *args, **kwargs):
+        return self._call('delete_message', *args, **kwargs)
+
+    def answer_callback_query(self, *args, **kwargs):
+        return self._call('answer_callback_query', *args, **kwargs)
+
+
+class ApiError(Exception):
+    def __init__(self, error_code, retry_after=None):
+        super().__init__(f"error {error_code}")
+        self.error_code = error_code
+        self.result_json = {'parameters': {'retry_after': retry_after}} if retry_after is not None else {}
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+class ConnectTimeout(Exception):
+    pass
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
+
+
+@pytest.fixture
+def dispatcher(bot):
+    # Tanpa thread worker: tes memanggil _next_job/_execute sendiri agar urutan deterministik.
+    dispatcher = OutboundDispatcher(bot, global_rate=1000.0, chat_rate=1000.0, chat_burst=1000)
+    dispatcher.start = lambda: None
+    dispatcher.BASE_BACKOFF_SECONDS = 0.0
+    return dispatcher
+
+
+def run_all(dispatcher, limit=100):
+    for _ in range(limit):
+        with dispatcher._cond:
+            job, wait_for = dispatcher._next_job()
+        if job is None:
+            if wait_for is None:
+                return
+            time.sleep(wait_for)
+            continue
+        dispatcher._execute(job)
+    raise AssertionError("antrian tidak pernah kosong")
+
+
+def test_edit_reaches_bot_with_chat_and_message_id(dispatcher, bot):
+    future = dispatcher.edit_message_text("hi", -100, 5, parse_mode="Markdown")
+    run_all(dispatcher)
+    assert future.result(0) == ('edit_message_text', ("hi",), {'chat_id': -100, 'message_id': 5, 'parse_mode': "Markdown"})
+
+
+def test_priority_order_across_chats_and_fifo_within_chat(dispatcher, bot):
+    dispatcher.send_message(1, "chatter", priority=Priority.CHATTER)
+    dispatcher.send_message(2, "reply-a")
+    dispatcher.send_message(2, "reply-b")
+    dispatcher.delete_message(3, 10)
+    dispatcher.answer_callback_query("cb")
+    run_all(dispatcher)
+    order = [(method, args[1] if method == 'send_message' else args[0]) for method, args, _ in bot.calls]
+    assert order == [('delete_message', 3), ('answer_callback_query', 'cb'), ('send_message', 'reply-a'),
+                     ('send_message', 'reply-b'), ('send_message', 'chatter')]
+
+
+def test_busy_chat_does_not_block_other_chats_or_deletes(dispatcher, bot):
+    dispatcher.send_message(1, "first")
+    dispatcher.send_message(1, "second")
+    with dispatcher._cond:
+        first, _ = dispatcher._next_job()
+        # Chat 1 sedang mengirim: job kedua chat 1 harus menunggu, chat lain dan hapus pesan tidak.
+        dispatcher.send_message(2, "other")
+        dispatcher.delete_message(1, 99)
+        delete, _ = dispatcher._next_job()
+        other, _ = dispatcher._next_job()
+        blocked, _ = dispatcher._next_job()
+    assert first.args[1] == "first"
+    assert delete.label == 'delete_message'
+    assert other.args[1] == "other"
+    assert blocked is None
+    dispatcher._execute(first)
+    run_all(dispatcher)
+    assert bot.calls[-1][1][1] == "second"
+
+
+def test_deletes_ignore_chat_rate(bot):
+    dispatcher = OutboundDispatcher(bot, global_rate=1000.0, chat_rate=1.0, chat_burst=1)
+    dispatcher.start = lambda: None
+    dispatcher.send_message(1, "uses the only chat token")
+    futures = [dispatcher.delete_message(1, message_id) for message_id in range(8)]
+    started = time.monotonic()
+    run_all(dispatcher)
+    assert all(future.result(0) for future in futures)
+    assert time.monotonic() - started < 0.5
+
+
+def test_rate_limit_is_retried_after_retry_after(dispatcher, bot):
+    bot.failures['send_message'] = [ApiError(429, retry_after=0.05)]
+    future = dispatcher.send_message(1, "hello")
+    run_all(dispatcher)
+    assert future.result(0)[0] == 'send_message'
+    assert len(bot.calls) == 2
+    assert dispatcher.stats['rate_limited'] == 1
+
+
+def test_ambiguous_send_failure_is_not_retried(dispatcher, bot):
+    bot.failures['send_message'] = [ReadTimeout("read timed out")]
+    future = dispatcher.send_message(1, "hello")
+    run_all(dispatcher)
+    with pytest.raises(ReadTimeout):
+        future.result(0)
+    assert len(bot.calls) == 1
+
+
+def test_send_retried_when_connection_never_opened(dispatcher, bot):
+    bot.failures['send_message'] = [ConnectTimeout("connect timed out"), Exception("Failed to establish a new connection")]
+    future = dispatcher.send_message(1, "hello")
+    run_all(dispatcher)
+    assert future.result(0)[0] == 'send_message'
+    assert len(bot.calls) == 3
+
+
+def test_idempotent_calls_retry_transient_errors(dispatcher, bot):
+    bot.failures['edit_message_text'] = [ReadTimeout("read timed out"), ApiError(502)]
+    future = dispatcher.edit_message_text("hi", 1, 5)
+    run_all(dispatcher)
+    assert future.result(0)[0] == 'edit_message_text'
+    assert len(bot.calls) == 3
+
+
+def test_client_errors_are_not_retried(dispatcher, bot):
+    bot.failures['delete_message'] = [ApiError(400)]
+    future = dispatcher.delete_message(1, 5)
+    run_all(dispatcher)
+    with pytest.raises(ApiError):
+        future.result(0)
+    assert len(bot.calls) == 1
+
+
+def test_stale_low_priority_jobs_are_dropped(dispatcher, bot):
+    hype = dispatcher.send_message(1, "late hype", priority=Priority.CHATTER)
+    reply = dispatcher.send_message(1, "late reply")
+    with dispatcher._cond:
+        for queue in dispatcher._chat_queues.values():
+            for entry in queue:
+                entry[2].enqueued -= dispatcher.STALE_SECONDS + 1
+    run_all(dispatcher)
+    with pytest.raises(DroppedJob):
+        hype.result(0)
+    assert reply.result(0)[1][1] == "late reply"
+    assert dispatcher.stats['dropped'] == 1
+    assert dispatcher.depth() == 0
+
+
+def test_newer_edit_supersedes_rate_limited_partial_edit(dispatcher, bot):
+    bot.failures['edit_message_text'] = [ApiError(429, retry_after=0.05)]
+    partial = dispatcher.edit_message_text("partial ▌", 1, 5)
+    with dispatcher._cond:
+        job, _ = dispatcher._next_job()
+    dispatcher._execute(job)  # 429: diantrikan ulang
+    final = dispatcher.edit_message_text("final answer", 1, 5)
+    run_all(dispatcher)
+    assert partial.result(0) is None
+    assert final.result(0)[1] == ("final answer",)
+    assert [args[0] for _, args, _ in bot.calls] == ["partial ▌", "final answer"]
+    assert dispatcher.stats['superseded'] == 1
+    assert dispatcher._latest_edit == {}
@@ -0,0 +1,29 @@
+import threading
+
+from profiler import SamplingProfiler
+
+
+def test_start_is_refused_while_report_is_being_written(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+    writing, release = threading.Event(), threading.Event()
+    write_report = profiler._write_report
+
+    def slow_write(elapsed, updates):
+        writing.set()
+        release.wait(2)
+        return write_report(elapsed, updates)
+
+    profiler._write_report = slow_write
+    done = threading.Event()
+    reports = []
+    assert profiler.start(updates=2, on_done=lambda report: (reports.append(report), done.set()))
+    handler = profiler.counted(lambda: None)
+    handler()
+    handler()
+    assert writing.wait(2)
+    # Laporan sedang ditulis: start() kedua tidak boleh me-reset penghitung.
+    assert profiler.start(updates=5) is False
+    release.set()
+    assert done.wait(2)
+    assert reports[0]['updates'] == 2
+    assert profiler.active is False
@@ -0,0 +1,50 @@
+import threading
+
+from update_queue import UpdateDispatcher, extract_chat_id
+
+
+def message_update(update_id, chat_id):
+    return {'update_id': update_id, 'message': {'chat': {'id': chat_id}, 'text': "gm"}}
+
+
+def test_extract_chat_id_from_message_and_callback():
+    assert extract_chat_id(message_update(1, -100)) == -100
+    assert extract_chat_id({'callback_query': {'message': {'chat': {'id': 5}}}}) == 5
+    assert extract_chat_id({'inline_query': {}}) is None
+
+
+def test_duplicates_and_busy_updates_are_counted():
+    dispatcher = UpdateDispatcher(lambda update: None, workers=1, queue_size=1)
+    assert dispatcher.submit(message_update(1, -100)) == UpdateDispatcher.QUEUED
+    assert dispatcher.submit(message_update(1, -100)) == UpdateDispatcher.DUPLICATE
+    assert dispatcher.submit(message_update(2, -100)) == UpdateDispatcher.BUSY
+    # Update yang ditolak boleh dikirim ulang Telegram dan tidak dianggap duplikat.
+    dispatcher._queues[0].get_nowait()
+    assert dispatcher.submit(message_update(2, -100)) == UpdateDispatcher.QUEUED
+    snapshot = dispatcher.snapshot()
+    assert (snapshot['queued'], snapshot['duplicates'], snapshot['rejected']) == (2, 1, 1)
+
+
+def test_worker_counters_are_exact_under_concurrency():
+    total = 4000
+    failing = set(range(0, total, 7))
+    done = threading.Semaphore(0)
+
+    def process_update(update):
+        try:
+            if update['update_id'] in failing:
+                raise ValueError("boom")
+        finally:
+            done.release()
+
+    dispatcher = UpdateDispatcher(process_update, workers=8, queue_size=total)
+    dispatcher.start()
+    for update_id in range(total):
+        assert dispatcher.submit(message_update(update_id, update_id)) == UpdateDispatcher.QUEUED
+    for _ in range(total):
+        assert done.acquire(timeout=5)
+    for q in dispatcher._queues:
+        q.join()
+    snapshot = dispatcher.snapshot()
+    assert snapshot['processed'] == total - len(failing)
+    assert snapshot['errors'] == len(failing)
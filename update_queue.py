@@ -0,0 +1,106 @@
+import logging
+import queue
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def extract_chat_id(update):
+    """Mencari chat_id dari update mentah (dict) untuk menjaga urutan per chat."""
+    for key in ('message', 'edited_message', 'channel_post', 'edited_channel_post', 'chat_member', 'my_chat_member', 'chat_join_request'):
+        obj = update.get(key)
+        if obj and isinstance(obj.get('chat'), dict):
+            return obj['chat'].get('id')
+    callback = update.get('callback_query')
+    if callback and isinstance(callback.get('message'), dict):
+        return callback['message'].get('chat', {}).get('id')
+    return None
+
+
+class UpdateDispatcher:
+    """
+    Antrian update in-process dengan kumpulan worker.
+    Webhook cukup memanggil submit() lalu langsung membalas 200; worker yang
+    menjalankan handler BotLogic. Setiap chat selalu dipetakan ke worker yang
+    sama sehingga urutan pesan per chat tetap terjaga.
+    """
+    QUEUED = 'queued'
+    DUPLICATE = 'duplicate'
+    BUSY = 'busy'
+
+    def __init__(self, process_update, workers=4, queue_size=1000, dedupe_size=10000):
+        self.process_update = process_update
+        self.workers = max(1, int(workers))
+        per_worker = max(1, int(queue_size) // self.workers)
+        self._queues = [queue.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._seen = OrderedDict()
+        self._dedupe_size = dedupe_size
+        self._lock = threading.Lock()
+        self._threads = []
+        self.stats = {'queued': 0, 'duplicates': 0, 'rejected': 0, 'processed': 0, 'errors': 0}
+
+    def start(self):
+        for index, q in enumerate(self._queues):
+            thread = threading.Thread(target=self._worker, args=(q,), name=f"update-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"UpdateDispatcher dimulai dengan {self.workers} worker.")
+
+    def _is_duplicate(self, update_id):
+        if update_id is None:
+            return False
+        with self._lock:
+            if update_id in self._seen:
+                self.stats['duplicates'] += 1
+                return True
+            self._seen[update_id] = None
+            if len(self._seen) > self._dedupe_size:
+                self._seen.popitem(last=False)
+            return False
+
+    def _reject(self, update_id):
+        with self._lock:
+            self._seen.pop(update_id, None)
+            self.stats['rejected'] += 1
+
+    def _count(self, key):
+        # Penghitung diubah dari webhook dan semua worker; += pada dict tidak atomik.
+        with self._lock:
+            self.stats[key] += 1
+
+    def submit(self, update):
+        """Memasukkan update (dict) ke antrian. Mengembalikan QUEUED, DUPLICATE, atau BUSY."""
+        update_id = update.get('update_id')
+        if self._is_duplicate(update_id):
+            return self.DUPLICATE
+        chat_id = extract_chat_id(update)
+        shard = hash(chat_id if chat_id is not None else update_id) % self.workers
+        try:
+            self._queues[shard].put_nowait(update)
+        except queue.Full:
+            # Update belum diproses, jadi Telegram boleh mengirim ulang nanti.
+            self._reject(update_id)
+            return self.BUSY
+        self._count('queued')
+        return self.QUEUED
+
+    def _worker(self, q):
+        while True:
+            update = q.get()
+            try:
+                self.process_update(update)
+                self._count('processed')
+            except Exception as e:
+                self._count('errors')
+                logger.error(f"Worker gagal memproses update {update.get('update_id')}: {e}", exc_info=True)
+            finally:
+                q.task_done()
+
+    def depth(self):
+        return sum(q.qsize() for q in self._queues)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        return dict(stats, depth=self.depth(), workers=self.workers)
@@ -0,0 +1,43 @@
+import logging
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Hanya jenis update yang punya handler. 'chat_member' tidak termasuk default Telegram;
+# dibutuhkan untuk invalidasi cache admin. Dipakai juga oleh getUpdates di poller.py.
+ALLOWED_UPDATES = ['message', 'callback_query', 'chat_member']
+
+
+def webhook_is_current(bot, webhook_url):
+    """True jika Telegram sudah memakai URL dan daftar allowed_updates yang sama."""
+    try:
+        info = bot.get_webhook_info()
+    except Exception as e:
+        logger.warning(f"getWebhookInfo gagal, webhook akan didaftarkan ulang: {e}")
+        return False
+    return info.url == webhook_url and set(info.allowed_updates or ()) == set(ALLOWED_UPDATES)
+
+
+def configure_webhook(bot, skip_if_current=False):
+    """Mendaftarkan ulang webhook Telegram ke WEBHOOK_BASE_URL; dipakai oleh mode sinkron dan async."""
+    webhook_url = f"{Config.WEBHOOK_BASE_URL()}/{Config.BOT_TOKEN()}"
+    if skip_if_current and webhook_is_current(bot, webhook_url):
+        logger.info("✅ Webhook sudah sesuai, pendaftaran ulang dilewati.")
+        return True
+    logger.info("Memulai bot dan mengatur webhook...")
+    try:
+        if not skip_if_current:
+            bot.remove_webhook()
+            time.sleep(0.5)
+        # set_webhook sendiri sudah menggantikan webhook lama, jadi mode fast start tidak menghapusnya dulu.
+        success = bot.set_webhook(url=webhook_url, allowed_updates=ALLOWED_UPDATES)
+        if success:
+            logger.info("✅ Webhook berhasil diatur.")
+        else:
+            logger.error("❌ Gagal mengatur webhook.")
+        return success
+    except Exception as e:
+        logger.error(f"Error saat mengkonfigurasi webhook: {e}", exc_info=True)
+        return False